@@ -1,7 +1,20 @@
 from django.contrib import admin
-from .models import MenuItem
+from .models import DatedMenuItem, Ingredient, MenuItem
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
     list_display = ['day_of_week', 'meal_type', 'price', 'available_quantity']
-    list_filter = ['day_of_week', 'meal_type']
\ No newline at end of file
+    list_filter = ['day_of_week', 'meal_type']
+
+
+@admin.register(DatedMenuItem)
+class DatedMenuItemAdmin(admin.ModelAdmin):
+    list_display = ['date', 'meal_type', 'price', 'available_quantity']
+    list_filter = ['meal_type']
+    date_hierarchy = 'date'
+
+
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
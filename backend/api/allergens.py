@@ -0,0 +1,114 @@
+# api/allergens
+# Индекс ингредиентов: текстовые поля MenuItem.menu_items и User.allergies
+# разбираются в нормализованные названия, сопоставление идёт по множествам id.
+import re
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from .menu import MENU_CACHE_TIMEOUT, get_menu_version
+from .models import Ingredient, MenuItem, User
+
+
+SEPARATORS = re.compile(r'[,;/\n]+|\s+и\s+')
+
+
+def normalize(name):
+    name = ' '.join(name.lower().replace('ё', 'е').split())
+    return name.strip(' .')[:100]
+
+
+def parse_ingredients(text):
+    """'Омлет, каша и чай' -> {'омлет', 'каша', 'чай'}"""
+    return {name for name in map(normalize, SEPARATORS.split(text or '')) if name}
+
+
+def ingredient_ids(names):
+    if not names:
+        return set()
+    Ingredient.objects.bulk_create([Ingredient(name=name) for name in names], ignore_conflicts=True)
+    return set(Ingredient.objects.filter(name__in=names).values_list('id', flat=True))
+
+
+def index_menu_item(item):
+    item.ingredients.set(ingredient_ids(parse_ingredients(item.menu_items)))
+
+
+def index_user(user):
+    user.allergens.set(ingredient_ids(parse_ingredients(user.allergies)))
+
+
+def dish_ingredients():
+    """{id блюда: {id ингредиента: название}}; кэшируется на версию меню."""
+    key = f'weekly_menu:ingredients:{get_menu_version()}'
+    dishes = cache.get(key)
+    if dishes is None:
+        dishes = defaultdict(dict)
+        links = MenuItem.ingredients.through.objects.values_list(
+            'menuitem_id', 'ingredient_id', 'ingredient__name'
+        )
+        for dish_id, ingredient_id, name in links:
+            dishes[dish_id][ingredient_id] = name
+        dishes = dict(dishes)
+        cache.set(key, dishes, MENU_CACHE_TIMEOUT)
+    return dishes
+
+
+def menu_ingredients(items):
+    """{ключ строки меню на дату: {id ингредиента: название}}, ключ — (дата, приём пищи).
+
+    Строка с составом шаблона берёт готовый индекс шаблона; изменённый на дату
+    состав разбирается из текста, названия сопоставляются одним запросом.
+    """
+    dishes = dish_ingredients()
+    result, parsed = {}, {}
+    for item in items:
+        key = (item.date, item.meal_type)
+        if item.template_id is not None and item.menu_items == item.template.menu_items:
+            result[key] = dishes.get(item.template_id, {})
+        else:
+            parsed[key] = parse_ingredients(item.menu_items)
+    if parsed:
+        ids = dict(Ingredient.objects.filter(
+            name__in=set().union(*parsed.values())
+        ).values_list('name', 'id'))
+        for key, names in parsed.items():
+            result[key] = {ids[name]: name for name in names if name in ids}
+    return result
+
+
+def user_allergen_names(user_id):
+    return set(User.allergens.through.objects.filter(user_id=user_id).values_list('ingredient__name', flat=True))
+
+
+def affected_users(dishes):
+    """Для каждого блюда — множество пользователей, у которых аллергия хотя бы на один ингредиент.
+
+    Строим обратный индекс ингредиент -> пользователи одним запросом,
+    затем для блюда объединяем множества его ингредиентов.
+    """
+    used = set().union(*(ingredients.keys() for ingredients in dishes.values()))
+    allergic = defaultdict(set)
+    links = User.allergens.through.objects.filter(ingredient_id__in=used).values_list('ingredient_id', 'user_id')
+    for ingredient_id, user_id in links:
+        allergic[ingredient_id].add(user_id)
+
+    return {
+        dish_id: set().union(*(allergic[ingredient_id] for ingredient_id in ingredients if ingredient_id in allergic))
+        for dish_id, ingredients in dishes.items()
+    }
+
+
+def mark_safe_menu(weekly_menu, allergen_names):
+    """Помечает блюда недельного меню: safe и список опасных для пользователя ингредиентов.
+
+    Состав на дату мог быть изменён относительно шаблона, поэтому разбираем текст
+    самой строки меню — это микросекунды на неделю.
+    """
+    for meals in weekly_menu.values():
+        for items in meals.values():
+            for item in items:
+                unsafe = sorted(parse_ingredients(item['menu_items']) & allergen_names)
+                item['safe'] = not unsafe
+                item['allergens'] = unsafe
+    return weekly_menu
@@ -0,0 +1,158 @@
+# api/async_views
+# Асинхронные (ASGI) варианты представлений, которые только читают данные.
+# Под ASGI запрос не занимает поток, пока ждёт базу; под WSGI они тоже работают.
+import asyncio
+from datetime import date, datetime
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from .authentication import StatelessJWTAuthentication
+from .events import get_broker, format_sse
+from .menu import aget_weekly_menu, menu_etag_response, parse_menu_date
+from .models import User
+from .permissions import IsCookRole
+from .reports import aday_counters
+from .roster import ROSTER_MEAL_TYPES, ensure_roster
+
+
+def json_response(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+class AsyncAPIView(View):
+    """Проверка JWT без загрузки User (как StatelessJWTAuthentication) для async-представлений.
+
+    permission_classes — классы прав DRF, проверяются после аутентификации.
+    """
+
+    authentication_required = True
+    permission_classes = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authentication_required:
+            try:
+                result = await sync_to_async(StatelessJWTAuthentication().authenticate)(request)
+            except (AuthenticationFailed, InvalidToken):
+                result = None
+            if result is None:
+                return json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+            request.user = result[0]
+            for permission in self.permission_classes:
+                if not permission().has_permission(request, self):
+                    return json_response(
+                        {'detail': 'You do not have permission to perform this action.'}, status=403
+                    )
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncWeeklyMenuView(AsyncAPIView):
+    authentication_required = False
+
+    async def get(self, request):
+        try:
+            day = parse_menu_date(request)
+        except ValueError as error:
+            return json_response({'error': str(error)}, status=400)
+        return menu_etag_response(request, *await aget_weekly_menu(day))
+
+
+class AsyncPaidStudentsView(AsyncAPIView):
+    async def get(self, request):
+        target_date = request.GET.get('date')
+        meal_type = request.GET.get('meal_type')
+
+        if not target_date or not meal_type:
+            return json_response({'error': 'Укажите date и meal_type'}, status=400)
+        if meal_type not in ROSTER_MEAL_TYPES:
+            return json_response({'error': 'Неизвестный meal_type'}, status=400)
+
+        try:
+            date_obj = datetime.strptime(target_date, '%Y-%m-%d').date()
+        except ValueError:
+            return json_response({'error': 'Неверный формат даты (ожидается YYYY-MM-DD)'}, status=400)
+
+        await sync_to_async(ensure_roster)(date_obj, meal_type)
+        users = User.objects.filter(
+            mealeligibility__date=date_obj,
+            mealeligibility__meal_type=meal_type
+        ).values('id', 'username', 'role')
+        return json_response([user async for user in users])
+
+
+class AsyncAdminStatsView(AsyncAPIView):
+    async def get(self, request):
+        counters = await aday_counters(date.today())
+
+        return json_response({
+            'today_payments': counters['one_time_payments'],
+            'active_subscriptions': counters['active_subscriptions'],
+            'unique_students_today': counters['unique_students'],
+            'meals_issued_today': counters['meals_issued'],
+        })
+
+
+class AsyncDailyReportView(AsyncAPIView):
+    async def get(self, request):
+        target_date_str = request.GET.get('date')
+        if not target_date_str:
+            return json_response({'error': 'Укажите date'}, status=400)
+
+        try:
+            target_date = datetime.strptime(target_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return json_response({'error': 'Неверный формат даты'}, status=400)
+
+        counters = await aday_counters(target_date)
+
+        return json_response({
+            'date': target_date_str,
+            'breakfast_count': counters['breakfast_count'],
+            'lunch_count': counters['lunch_count'],
+            'subscriptions_used': counters['active_subscriptions'],
+            'one_time_payments': counters['one_time_payments'],
+            'meals_issued': counters['meals_issued'],
+        })
+
+
+class LiveFeedView(AsyncAPIView):
+    """Server-Sent Events: изменения остатков, новые выдачи и оплаты без опроса сервера.
+
+    В событиях оплаты и выдачи — id учеников всей школы, поэтому поток только для персонала.
+    """
+    permission_classes = [IsCookRole]
+
+    KEEPALIVE_SECONDS = 15
+
+    async def dispatch(self, request, *args, **kwargs):
+        # EventSource в браузере не умеет передавать заголовки — токен можно передать в ?token=
+        if 'HTTP_AUTHORIZATION' not in request.META and request.GET.get('token'):
+            request.META['HTTP_AUTHORIZATION'] = f"Bearer {request.GET['token']}"
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request):
+        response = StreamingHttpResponse(self.stream(request.school), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, school):
+        broker = get_broker()
+        subscriber = broker.subscribe()
+        _, queue = subscriber
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                # Брокер общий для всех школ — отдаём только события своей
+                if event['school'] == school:
+                    yield format_sse(event)
+        finally:
+            broker.unsubscribe(subscriber)
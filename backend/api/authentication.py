@@ -0,0 +1,89 @@
+# api/authentication
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tenancy import current_school
+
+
+def _state_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def get_user_state(user_id):
+    """Роль и активность пользователя; БД читается не чаще раза в USER_STATE_TTL."""
+    state = cache.get(_state_key(user_id))
+    if state is None:
+        row = User.objects.filter(id=user_id).values('is_active', 'role').first()
+        state = row or {'is_active': False, 'role': None}
+        cache.set(_state_key(user_id), state, settings.USER_STATE_TTL)
+    return state
+
+
+def forget_user_state(user_id):
+    cache.delete(_state_key(user_id))
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из claims токена (id, username, role) без запроса к БД."""
+
+    def __init__(self, token, role):
+        super().__init__(token)
+        self.role = role
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+
+class SchoolClaimMixin:
+    """Токен действует только в школе, которая его выдала: id пользователей в базах школ пересекаются."""
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        # Токены, выданные до разделения по школам, относятся к школе по умолчанию
+        if validated_token.get('school', settings.DEFAULT_SCHOOL) != current_school():
+            raise InvalidToken('Token was issued for another school')
+        return validated_token
+
+
+class SchoolJWTAuthentication(SchoolClaimMixin, JWTAuthentication):
+    pass
+
+
+class StatelessJWTAuthentication(SchoolClaimMixin, JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        state = get_user_state(user_id)
+        if not state['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        # Роль могла смениться после выдачи токена — верим кэшу, а не claim
+        return ClaimsUser(validated_token, role=state['role'])
+
+
+class StatelessReadMixin:
+    """GET/HEAD/OPTIONS аутентифицируются по токену без загрузки User; запись — как обычно."""
+
+    def get_authenticators(self):
+        if settings.STATELESS_JWT_AUTH and self.request.method in SAFE_METHODS:
+            return [StatelessJWTAuthentication()]
+        return super().get_authenticators()
+
+
+class StatelessAuthMixin:
+    """Все методы аутентифицируются без загрузки User: для записей, которым нужны только id и роль."""
+
+    def get_authenticators(self):
+        if settings.STATELESS_JWT_AUTH:
+            return [StatelessJWTAuthentication()]
+        return super().get_authenticators()
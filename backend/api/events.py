@@ -0,0 +1,75 @@
+# api/events
+# Поток изменений для панелей повара: остатки, выдачи, оплаты.
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .tenancy import current_db, current_school
+
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class InProcessBroker:
+    """Pub/sub в памяти процесса: годится, когда сервер запущен в один процесс."""
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            loop, queue = subscriber
+            try:
+                # publish вызывается из потоков синхронных представлений
+                loop.call_soon_threadsafe(_put, queue, event)
+            except RuntimeError:
+                # Цикл событий клиента уже закрыт
+                self.unsubscribe(subscriber)
+
+
+def _put(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # Медленный клиент пропускает событие; при переподключении он перечитает состояние
+        pass
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.LIVE_FEED_BROKER)()
+    return _broker
+
+
+def publish(event_type, **data):
+    """Отправляет событие подписчикам после фиксации транзакции."""
+    event = {'type': event_type, 'school': current_school(), 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(event), using=current_db())
+
+
+def format_sse(event):
+    payload = json.dumps(event['data'], cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"event: {event['type']}\ndata: {payload}\n\n"
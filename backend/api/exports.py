@@ -0,0 +1,60 @@
+# api/exports
+import csv
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .models import MealPayment, Subscription, MealIssued, PurchaseRequest
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Псевдо-файл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def _payments(date_from, date_to):
+    return MealPayment.objects.filter(date__gte=date_from, date__lte=date_to).order_by('date', 'id')
+
+
+def _issued(date_from, date_to):
+    return MealIssued.objects.filter(date__gte=date_from, date__lte=date_to).order_by('date', 'id')
+
+
+def _subscriptions(date_from, date_to):
+    return Subscription.objects.overlapping(date_from, date_to).order_by('start_date', 'id')
+
+
+def _purchase_requests(date_from, date_to):
+    # Границы по самому created_at, а не по created_at__date, чтобы поиск шёл по индексу
+    return PurchaseRequest.objects.filter(
+        created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)),
+        created_at__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)),
+    ).order_by('created_at', 'id')
+
+
+# вид выгрузки -> (выборка, колонки)
+EXPORTS = {
+    'payments': (_payments, ['id', 'user_id', 'user__username', 'date', 'meal_type', 'amount', 'paid_at']),
+    'issued': (_issued, ['id', 'user_id', 'user__username', 'date', 'meal_type', 'issued_at']),
+    'subscriptions': (_subscriptions, ['id', 'user_id', 'user__username', 'start_date', 'end_date', 'created_at']),
+    'purchase-requests': (_purchase_requests, [
+        'id', 'product_name', 'quantity', 'unit', 'status', 'created_by__username', 'created_at'
+    ]),
+}
+
+
+def stream_csv(kind, date_from, date_to):
+    """Построчно отдаёт CSV, читая выборку порциями — память не зависит от числа строк."""
+    get_queryset, columns = EXPORTS[kind]
+    rows = get_queryset(date_from, date_to).values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    writer = csv.writer(Echo())
+    # BOM, чтобы Excel правильно открыл кириллицу
+    yield '\ufeff' + writer.writerow([column.replace('__', '_') for column in columns])
+    for row in rows:
+        yield writer.writerow(row)
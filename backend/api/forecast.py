@@ -0,0 +1,135 @@
+# api/forecast
+# Прогноз спроса на порции по истории DailyMealStats (сводки из api.rollups).
+#
+# Для каждого дня считаем спрос на блюдо (выдано завтраков/обедов, комплекс идёт в оба)
+# и число записанных (разовые оплаты + активные абонементы). Прогноз на день D:
+#   - baseline: взвешенное среднее спроса за последние WEEKS таких же дней недели;
+#   - rate: взвешенная доля пришедших среди записанных за те же дни;
+#   - прогноз = max(baseline, rate * записанных на D уже сейчас), с округлением вверх.
+# Дни недели в непрерывном ряду отстоят на 7, поэтому история для любого набора
+# целевых дней берётся одной матрицей индексов — без циклов по дням.
+from datetime import timedelta
+
+import numpy as np
+
+from .menu import materialize
+from .models import DailyMealStats, DatedMenuItem, MenuItem, PurchaseRequest
+
+
+PORTION_MEAL_TYPES = ('breakfast', 'lunch')
+PURCHASE_UNIT = 'порц.'
+STATS_MEAL_TYPES = ('breakfast', 'lunch', 'combined')
+WEEKS = 8
+DECAY = 0.75
+
+
+def load_series(date_from, date_to):
+    """Ряды по дням [date_from, date_to] из DailyMealStats одним запросом.
+
+    Возвращает {'breakfast': (demand, enrolled), 'lunch': (demand, enrolled)} — массивы длины дней.
+    """
+    days = (date_to - date_from).days + 1
+    issued = np.zeros((len(STATS_MEAL_TYPES), days))
+    payments = np.zeros((len(STATS_MEAL_TYPES), days))
+    subscriptions = np.zeros(days)
+
+    rows = list(DailyMealStats.objects.filter(date__gte=date_from, date__lte=date_to).values_list(
+        'date', 'meal_type', 'issued', 'one_time_payments', 'active_subscriptions'
+    ))
+    if rows:
+        dates, meal_types, issued_counts, payment_counts, subscription_counts = zip(*rows)
+        day = np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(rows)) - date_from.toordinal()
+        meal = np.fromiter((STATS_MEAL_TYPES.index(m) for m in meal_types), dtype=np.int64, count=len(rows))
+        issued[meal, day] = issued_counts
+        payments[meal, day] = payment_counts
+        # Абонемент действует на все приёмы пищи, в каждой строке дня одно и то же число
+        np.maximum.at(subscriptions, day, np.asarray(subscription_counts, dtype=float))
+
+    return series_from_counts(issued, payments, subscriptions)
+
+
+def series_from_counts(issued, payments, subscriptions):
+    """Выдачи и оплаты по (breakfast, lunch, combined) -> спрос и записанные по блюдам."""
+    breakfast, lunch, combined = range(len(STATS_MEAL_TYPES))
+    return {
+        'breakfast': (issued[breakfast] + issued[combined], payments[breakfast] + payments[combined] + subscriptions),
+        'lunch': (issued[lunch] + issued[combined], payments[lunch] + payments[combined] + subscriptions),
+    }
+
+
+def predict(demand, enrolled, targets, known):
+    """Прогноз для индексов targets; known — сколько записано на эти дни на момент прогноза."""
+    targets = np.asarray(targets)
+    lags = 7 * np.arange(1, WEEKS + 1)
+    idx = targets[:, None] - lags[None, :]
+    valid = idx >= 0
+    idx = np.where(valid, idx, 0)
+    weights = np.where(valid, DECAY ** np.arange(WEEKS), 0.0)
+
+    weighted_demand = (weights * demand[idx]).sum(axis=1)
+    weight_total = weights.sum(axis=1)
+    enrolled_total = (weights * enrolled[idx]).sum(axis=1)
+
+    baseline = np.divide(weighted_demand, weight_total, out=np.zeros(len(targets)), where=weight_total > 0)
+    rate = np.divide(weighted_demand, enrolled_total, out=np.ones(len(targets)), where=enrolled_total > 0)
+    return np.ceil(np.maximum(baseline, rate * np.asarray(known, dtype=float))).astype(int)
+
+
+def forecast_day(target_date):
+    """Прогноз порций завтрака и обеда на target_date по истории до него."""
+    date_from = target_date - timedelta(days=7 * WEEKS)
+    series = load_series(date_from, target_date)
+    target = (target_date - date_from).days
+
+    result = {'date': target_date}
+    for meal_type in PORTION_MEAL_TYPES:
+        demand, enrolled = series[meal_type]
+        known = enrolled[target]
+        result[meal_type] = {
+            'predicted': int(predict(demand, enrolled, [target], [known])[0]),
+            'enrolled': int(known),
+            'history_days': int((demand[target - 7 * np.arange(1, WEEKS + 1)] > 0).sum()),
+        }
+    return result
+
+
+def apply_quantities(forecast):
+    """Выставляет available_quantity меню на дату прогноза; возвращает изменённые строки."""
+    materialize(forecast['date'], forecast['date'])
+    items = DatedMenuItem.objects.filter(date=forecast['date'], meal_type__in=PORTION_MEAL_TYPES)
+    changed = []
+    for item in items:
+        # Без истории прогноз ничего не знает — не обнуляем остаток, выставленный поваром
+        if not forecast[item.meal_type]['history_days']:
+            continue
+        quantity = forecast[item.meal_type]['predicted']
+        if item.available_quantity != quantity:
+            item.available_quantity = quantity
+            # save(), а не update(): сигналы сбрасывают кэш меню и оповещают панель повара
+            item.save(update_fields=['available_quantity'])
+            changed.append(item)
+    return changed
+
+
+def draft_purchase_requests(forecast, user):
+    """Черновые заявки (pending) на ингредиенты блюд дня: по порции на прогнозного едока.
+
+    Ингредиент, по которому уже есть заявка в ожидании, пропускается.
+    """
+    needed = {}
+    items = MenuItem.objects.filter(
+        day_of_week=forecast['date'].isoweekday(),
+        meal_type__in=PORTION_MEAL_TYPES
+    ).prefetch_related('ingredients')
+    for item in items:
+        for ingredient in item.ingredients.all():
+            needed[ingredient.name] = needed.get(ingredient.name, 0) + forecast[item.meal_type]['predicted']
+
+    pending = set(PurchaseRequest.objects.filter(
+        status='pending', product_name__in=needed
+    ).values_list('product_name', flat=True))
+    return PurchaseRequest.objects.bulk_create([
+        PurchaseRequest(product_name=name, quantity=quantity, unit=PURCHASE_UNIT, created_by=user)
+        for name, quantity in sorted(needed.items())
+        if quantity > 0 and name not in pending
+    ])
@@ -0,0 +1,153 @@
+# api/issuing
+from collections import Counter
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+
+from .models import User, MealIssued, MealEligibility
+from .roster import ROSTER_MEAL_TYPES, ensure_roster, is_eligible
+from .reports import invalidate_days
+from .rollups import record_issued
+from .events import publish
+from .tenancy import current_db
+
+
+MAX_BATCH_SIZE = 1000
+MEAL_TYPES = {value for value, _ in MealIssued._meta.get_field('meal_type').choices}
+
+
+def issued_rows(user_ids, dates):
+    return MealIssued.objects.filter(user_id__in=user_ids, date__in=dates)
+
+
+def _parse_item(item):
+    if not isinstance(item, dict):
+        return None
+    try:
+        user_id = int(item.get('user_id'))
+        meal_type = item.get('meal_type')
+        date_obj = datetime.strptime(item.get('date'), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+    if meal_type not in MEAL_TYPES:
+        return None
+    return user_id, date_obj, meal_type
+
+
+def issue_meals(items):
+    """Выдаёт питание пачкой за постоянное число запросов (право на питание берётся из MealEligibility).
+
+    Для каждого элемента возвращает статус: issued, already_issued, unpaid,
+    unknown_user или invalid.
+    """
+    keys = [_parse_item(item) for item in items]
+    valid = [key for key in keys if key is not None]
+    user_ids = {user_id for user_id, _, _ in valid}
+    dates = {date_obj for _, date_obj, _ in valid}
+
+    known_users = set()
+    eligible = set()
+    issued = set()
+    if valid:
+        for date_obj, meal_type in {(date_obj, meal_type) for _, date_obj, meal_type in valid}:
+            ensure_roster(date_obj, meal_type)
+        known_users = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        eligible = set(MealEligibility.objects.filter(
+            user_id__in=user_ids, date__in=dates
+        ).values_list('user_id', 'date', 'meal_type'))
+        issued = set(issued_rows(user_ids, dates).values_list('user_id', 'date', 'meal_type'))
+
+    statuses = []
+    to_create = {}
+    for key in keys:
+        if key is None:
+            statuses.append('invalid')
+            continue
+        user_id, date_obj, meal_type = key
+        if user_id not in known_users:
+            statuses.append('unknown_user')
+        elif key in issued or key in to_create:
+            statuses.append('already_issued')
+        elif key in eligible:
+            to_create[key] = MealIssued(user_id=user_id, date=date_obj, meal_type=meal_type)
+            statuses.append('issued')
+        else:
+            statuses.append('unpaid')
+
+    if to_create:
+        with transaction.atomic(using=current_db()):
+            MealIssued.objects.bulk_create(to_create.values(), ignore_conflicts=True)
+            # Строки, которые успел вставить другой повар, сохранили своё issued_at
+            stored = {
+                (user_id, date_obj, meal_type): issued_at
+                for user_id, date_obj, meal_type, issued_at in issued_rows(
+                    {key[0] for key in to_create}, {key[1] for key in to_create}
+                ).values_list('user_id', 'date', 'meal_type', 'issued_at')
+            }
+        lost = {key for key, obj in to_create.items() if stored.get(key) != obj.issued_at}
+        # bulk_create не отправляет post_save
+        created = Counter((key[1], key[2]) for key in to_create if key not in lost)
+        for (date_obj, meal_type), count in created.items():
+            invalidate_days(date_obj)
+            record_issued(date_obj, meal_type, count)
+        for user_id, date_obj, meal_type in to_create.keys() - lost:
+            publish('issued', user_id=user_id, date=date_obj, meal_type=meal_type)
+    else:
+        lost = set()
+
+    results = []
+    for item, key, item_status in zip(items, keys, statuses):
+        if item_status == 'issued' and key in lost:
+            item_status = 'already_issued'
+        results.append({
+            'user_id': item.get('user_id') if isinstance(item, dict) else None,
+            'meal_type': key[2] if key else None,
+            'date': key[1].isoformat() if key else None,
+            'status': item_status,
+        })
+    return results
+
+
+def issue_scanned(user_id, date_obj, meal_type):
+    """Выдача по талону: проверка права и вставка MealIssued в одной транзакции.
+
+    Возвращает issued, already_issued или unpaid.
+    """
+    with transaction.atomic(using=current_db()):
+        if not is_eligible(user_id, date_obj, meal_type):
+            return 'unpaid'
+        try:
+            # Вставка без предварительного SELECT: повтор отсекает уникальный индекс
+            with transaction.atomic(using=current_db()):
+                MealIssued.objects.create(user_id=user_id, date=date_obj, meal_type=meal_type)
+        except IntegrityError:
+            return 'already_issued'
+    return 'issued'
+
+
+def day_snapshot(date_obj):
+    """Всё, что нужно терминалу повара для работы без сети в этот день.
+
+    Списки — id учеников по типам приёма пищи; имена передаются один раз.
+    """
+    for meal_type in ROSTER_MEAL_TYPES:
+        ensure_roster(date_obj, meal_type)
+
+    roster = {meal_type: [] for meal_type in ROSTER_MEAL_TYPES}
+    usernames = {}
+    for meal_type, user_id, username in MealEligibility.objects.filter(date=date_obj).values_list(
+        'meal_type', 'user_id', 'user__username'
+    ):
+        roster[meal_type].append(user_id)
+        usernames[user_id] = username
+
+    issued = {meal_type: [] for meal_type in MEAL_TYPES}
+    for meal_type, user_id in MealIssued.objects.filter(date=date_obj).values_list('meal_type', 'user_id'):
+        issued.setdefault(meal_type, []).append(user_id)
+
+    return {
+        'date': date_obj,
+        'users': [[user_id, username] for user_id, username in usernames.items()],
+        'roster': roster,
+        'issued': issued,
+    }
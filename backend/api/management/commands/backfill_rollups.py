@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from api.models import MealPayment, Subscription, MealIssued
+from api.rollups import backfill
+from .rebuild_roster import parse_date
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает дневные сводки (DailyMealStats) по MealIssued, MealPayment и Subscription'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Первая дата (по умолчанию самая ранняя запись)')
+        parser.add_argument('--to', dest='date_to', help='Последняя дата (по умолчанию самая поздняя запись)')
+
+    def handle(self, *args, **options):
+        bounds = [
+            MealIssued.objects.aggregate(first=Min('date'), last=Max('date')),
+            MealPayment.objects.aggregate(first=Min('date'), last=Max('date')),
+            Subscription.objects.aggregate(first=Min('start_date'), last=Max('end_date')),
+        ]
+        firsts = [b['first'] for b in bounds if b['first']]
+        lasts = [b['last'] for b in bounds if b['last']]
+
+        date_from = parse_date(options['date_from']) if options['date_from'] else min(firsts, default=None)
+        date_to = parse_date(options['date_to']) if options['date_to'] else max(lasts, default=None)
+        if date_from is None or date_to is None:
+            self.stdout.write('Нет данных для пересчёта')
+            return
+        if date_to < date_from:
+            raise CommandError('--to раньше --from')
+
+        rows = backfill(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано сводок: {rows} ({date_from} — {date_to})'))
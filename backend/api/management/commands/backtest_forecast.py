@@ -0,0 +1,80 @@
+import time
+from datetime import date
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from api.forecast import PORTION_MEAL_TYPES, STATS_MEAL_TYPES, WEEKS, load_series, predict, series_from_counts
+from .rebuild_roster import parse_date
+
+
+def synthetic_counts(days, students, seed):
+    """Правдоподобная история: учебные дни пн-пт, каникулы летом, тренд и шум."""
+    rng = np.random.default_rng(seed)
+    start = date(2020, 1, 6)
+    ordinals = start.toordinal() + np.arange(days)
+    weekday = (ordinals - 1) % 7  # 0 = понедельник
+    day_of_year = np.array([date.fromordinal(int(o)).timetuple().tm_yday for o in ordinals])
+
+    school_day = (weekday < 5) & ~((day_of_year > 152) & (day_of_year < 244))
+    trend = 1 + 0.15 * np.arange(days) / days
+    weekday_factor = np.array([1.0, 1.05, 1.0, 0.95, 0.85, 0, 0])[weekday]
+
+    subscriptions = np.where(school_day, rng.poisson(0.25 * students * trend), 0)
+    payments = np.zeros((len(STATS_MEAL_TYPES), days))
+    issued = np.zeros((len(STATS_MEAL_TYPES), days))
+    for meal, share in enumerate((0.15, 0.2, 0.1)):
+        payments[meal] = np.where(school_day, rng.poisson(share * students * trend * weekday_factor), 0)
+        turnout = np.clip(rng.normal(0.92, 0.04, days), 0, 1)
+        # Абонементы едят комплекс
+        enrolled = payments[meal] + (subscriptions if STATS_MEAL_TYPES[meal] == 'combined' else 0)
+        issued[meal] = rng.binomial(enrolled.astype(int), turnout)
+    return issued, payments, subscriptions.astype(float)
+
+
+class Command(BaseCommand):
+    help = 'Проверяет точность и скорость прогноза спроса на синтетической или реальной истории'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=3, help='Лет синтетической истории')
+        parser.add_argument('--students', type=int, default=2000, help='Учеников в синтетической школе')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--from', dest='date_from', help='Проверить на DailyMealStats с этой даты')
+        parser.add_argument('--to', dest='date_to', help='... по эту дату (по умолчанию сегодня)')
+
+    def handle(self, *args, **options):
+        if options['date_from']:
+            date_from = parse_date(options['date_from'])
+            date_to = parse_date(options['date_to']) if options['date_to'] else date.today()
+            if date_to < date_from:
+                raise CommandError('--to раньше --from')
+            started = time.perf_counter()
+            series = load_series(date_from, date_to)
+            self.stdout.write(f'Загрузка истории: {time.perf_counter() - started:.3f} с')
+        else:
+            days = 365 * options['years']
+            series = series_from_counts(*synthetic_counts(days, options['students'], options['seed']))
+
+        for meal_type in PORTION_MEAL_TYPES:
+            demand, enrolled = series[meal_type]
+            # Первые WEEKS недель уходят на разгон истории; оцениваем только дни, когда кормили
+            targets = np.arange(7 * WEEKS, len(demand))
+            targets = targets[demand[targets] > 0]
+            if not len(targets):
+                self.stdout.write(f'{meal_type}: нет дней для проверки')
+                continue
+
+            started = time.perf_counter()
+            predicted = predict(demand, enrolled, targets, enrolled[targets])
+            elapsed = time.perf_counter() - started
+
+            actual = demand[targets]
+            naive = demand[targets - 7]
+            error = predicted - actual
+            self.stdout.write(
+                f'{meal_type}: дней {len(targets)}, '
+                f'MAE {np.abs(error).mean():.1f}, MAPE {100 * np.abs(error / actual).mean():.1f}%, '
+                f'нехватка в {100 * (error < 0).mean():.1f}% дней, '
+                f'MAE «как неделю назад» {np.abs(naive - actual).mean():.1f}, '
+                f'время {1000 * elapsed:.1f} мс'
+            )
@@ -0,0 +1,1015 @@
+import asyncio
+import itertools
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from copy import deepcopy
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, AsyncRequestFactory, Client, RequestFactory, override_settings
+from django.utils import timezone
+from django.utils.text import compress_string
+from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from api.allergens import affected_users, menu_ingredients, parse_ingredients
+from api.async_views import LiveFeedView
+from api.events import get_broker
+from api.issuing import MAX_BATCH_SIZE
+from api.menu import copy_forward, dated_menu, dated_rows, get_menu_version, get_weekly_menu, materialize, week_start
+from api.models import (
+    DatedMenuItem, MealEligibility, MealIssued, MealPayment, MenuItem, PurchaseRequest, Subscription, User,
+)
+from api.reports import compute_counters, day_counters, days_between
+from api.roster import ROSTER_MEAL_TYPES, ensure_roster
+from api.serializers import MenuItemSerializer, MyTokenObtainPairSerializer
+from api.subscriptions import SubscriptionIndex, get_index, invalidate_subscriptions
+from api.tenancy import current_db, current_school, use_school
+from api.pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_page
+from api.payments import MAX_CART_SIZE
+from api.renderers import ColumnarJSONRenderer
+from api.views import (
+    AdminPurchaseRequestsView, CookSyncView, IssueMealForUserView, IssueMealsBatchView, MenuAllergensView, PayCartView, PayMealView, WeeklyMenuView,
+)
+from .loadtest import percentile
+from .seed_school import PREFIX
+
+
+class LegacyWeeklyMenuView(APIView):
+    """Недельное меню до кэширования: 14 запросов и сериализация на каждый запрос — точка отсчёта."""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        weekly_menu = {}
+        for day in range(1, 8):
+            breakfast = MenuItemSerializer(
+                MenuItem.objects.filter(day_of_week=day, meal_type='breakfast'),
+                many=True
+            ).data
+            lunch = MenuItemSerializer(
+                MenuItem.objects.filter(day_of_week=day, meal_type='lunch'),
+                many=True
+            ).data
+            weekly_menu[day] = {
+                'breakfast': breakfast,
+                'lunch': lunch
+            }
+        return Response(weekly_menu)
+
+
+@contextmanager
+def rolled_back():
+    """Записи замера откатываются: бенчмарк можно гонять на рабочей копии данных."""
+    with transaction.atomic(using=current_db()):
+        yield
+        transaction.set_rollback(True, using=current_db())
+
+
+def timed(call):
+    """(запросов к базе, мс) для одного вызова."""
+    queries = 0
+
+    # Счётчик, а не CaptureQueriesContext: тот хранит не больше 9000 последних запросов
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connections[current_db()].execute_wrapper(count):
+        started = time.perf_counter()
+        call()
+        elapsed = 1000 * (time.perf_counter() - started)
+    return queries, elapsed
+
+
+def count_queries(call):
+    return timed(call)[0]
+
+
+@contextmanager
+def counting_queries():
+    """Считает запросы к базе во всех потоках процесса, включая соединения, открытые внутри блока."""
+    counter = {'queries': 0}
+    lock = threading.Lock()
+
+    def count(execute, sql, params, many, context):
+        with lock:
+            counter['queries'] += 1
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(count)
+
+    connection = connections[current_db()]
+    connection.execute_wrappers.append(count)
+    connection_created.connect(install)
+    try:
+        yield counter
+    finally:
+        connection_created.disconnect(install)
+        connection.execute_wrappers.remove(count)
+
+
+def median_ms(call, repeat=5):
+    """(запросов к базе, медиана мс) по repeat вызовам."""
+    runs = [timed(call) for _ in range(repeat)]
+    return runs[0][0], percentile(sorted(elapsed for _, elapsed in runs), 50)
+
+
+def seed_user(role):
+    user = User.objects.filter(username__startswith=f'{PREFIX}{role}_').first()
+    if user is None:
+        raise CommandError(f'Нет пользователей {PREFIX}{role}_*; сначала выполните seed_school')
+    return user
+
+
+def hammer(call, clients, requests, warmup=0):
+    """Вызывает call из clients потоков по requests раз; возвращает (время вызовов в мс по возрастанию, стена в с).
+
+    Первые warmup вызовов каждого потока не замеряются: поток открывает соединения с базами.
+    """
+    barrier = threading.Barrier(clients + 1)
+
+    def client():
+        timings = []
+        try:
+            try:
+                for _ in range(warmup):
+                    call()
+            except BaseException:
+                # Иначе остальные потоки и вызывающий ждали бы на барьере вечно
+                barrier.abort()
+                raise
+            barrier.wait()
+            for _ in range(requests):
+                started = time.perf_counter()
+                call()
+                timings.append(1000 * (time.perf_counter() - started))
+        finally:
+            # У каждого потока своё соединение с базой
+            connections.close_all()
+        return timings
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        futures = [pool.submit(client) for _ in range(clients)]
+        barrier.wait()
+        started = time.perf_counter()
+        timings = sorted(elapsed for future in futures for elapsed in future.result())
+    return timings, time.perf_counter() - started
+
+
+async def ahammer(call, clients, requests):
+    """То же для корутины call: clients клиентов в одном цикле событий."""
+    async def client():
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await call()
+            timings.append(1000 * (time.perf_counter() - started))
+        return timings
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(client() for _ in range(clients)))
+    timings = sorted(elapsed for timings in results for elapsed in timings)
+    return timings, time.perf_counter() - started
+
+
+def weekly_menu(command, options):
+    """Недельное меню: запросы к базе и p95 до (14 запросов) и после (кэш + ETag/304)."""
+    if not MenuItem.objects.exists():
+        raise CommandError('Меню пустое; сначала выполните seed_school')
+
+    factory = RequestFactory()
+    legacy_view = LegacyWeeklyMenuView.as_view()
+    view = WeeklyMenuView.as_view()
+
+    def legacy():
+        legacy_view(factory.get('/api/menu/weekly/')).render()
+
+    def current():
+        return view(factory.get('/api/menu/weekly/'))
+
+    # Первый запрос после правки меню собирает неделю заново
+    cache.delete(f'weekly_menu:{get_menu_version()}:{week_start(date.today()).isoformat()}')
+    cold = count_queries(current)
+    etag = current()['ETag']
+
+    def conditional():
+        response = view(factory.get('/api/menu/weekly/', HTTP_IF_NONE_MATCH=etag))
+        assert response.status_code == 304, response.status_code
+
+    variants = [
+        ('до: 14 запросов', legacy, count_queries(legacy)),
+        ('после: из кэша', current, count_queries(current)),
+        ('после: If-None-Match -> 304', conditional, count_queries(conditional)),
+    ]
+    command.stdout.write(f'Сборка недели после правки меню: {cold} запросов к базе')
+    command.report(variants, options)
+
+
+def issue_candidates(limit):
+    """Элементы для выдачи: у ученика есть право на приём пищи, а выдачи ещё не было; от сегодня назад."""
+    items = []
+    today = date.today()
+    for offset in range(60):
+        day = today - timedelta(days=offset)
+        for meal_type in ROSTER_MEAL_TYPES:
+            ensure_roster(day, meal_type)
+        issued = set(MealIssued.objects.filter(date=day).values_list('user_id', 'meal_type'))
+        items.extend(
+            {'user_id': user_id, 'meal_type': meal_type, 'date': day.isoformat()}
+            for user_id, meal_type in MealEligibility.objects.filter(date=day).values_list('user_id', 'meal_type')
+            if (user_id, meal_type) not in issued
+        )
+        if len(items) >= limit:
+            break
+    return items[:limit]
+
+
+def issue_batch(command, options):
+    """Выдача пачкой против выдачи по одному ученику: пачки 10/100/1000, все записи откатываются."""
+    cook = seed_user('cook')
+    sizes = options['sizes'] or [10, 100, 1000]
+    candidates = issue_candidates(max(sizes))
+    factory = APIRequestFactory()
+    one_view = IssueMealForUserView.as_view()
+    batch_view = IssueMealsBatchView.as_view()
+
+    def post(view, path, data):
+        request = factory.post(path, json.dumps(data), content_type='application/json')
+        force_authenticate(request, user=cook)
+        response = view(request)
+        assert response.status_code < 300, (response.status_code, response.data)
+        return response
+
+    def one_by_one(items):
+        for item in items:
+            post(one_view, '/api/cook/issue-meal-for-user/', item)
+
+    def batch(items):
+        results = post(batch_view, '/api/cook/issue-meals/', {'items': items}).data['results']
+        assert all(result['status'] == 'issued' for result in results), results
+
+    command.stdout.write(f"{'пачка':>6} {'вариант':<12} {'запросы':>8} {'мс':>9} {'мс/ученик':>10}")
+    for size in sizes:
+        items = candidates[:size]
+        if len(items) < size:
+            command.stdout.write(command.style.WARNING(f'Учеников с правом на питание без выдачи только {len(items)}'))
+        for name, call in (('по одному', one_by_one), ('пачкой', batch)):
+            with rolled_back():
+                queries, elapsed = timed(lambda: call(items))
+            command.stdout.write(
+                f'{len(items):>6} {name:<12} {queries:>8} {elapsed:>9.1f} {elapsed / max(len(items), 1):>10.2f}'
+            )
+
+
+def legacy_day_counters(day):
+    """Счётчики дня отдельными COUNT, как в AdminStatsView и DailyReportView до модуля отчётов."""
+    issued = MealIssued.objects.filter(date=day)
+    return {
+        'breakfast_count': issued.filter(meal_type='breakfast').count(),
+        'lunch_count': issued.filter(meal_type='lunch').count(),
+        'meals_issued': issued.count(),
+        'unique_students': issued.values('user').distinct().count(),
+        'one_time_payments': MealPayment.objects.filter(date=day).count(),
+        'active_subscriptions': Subscription.objects.active_on(day).count(),
+    }
+
+
+def day_counters_case(command, options):
+    """Счётчики дня и диапазона при 1k/10k/100k добавленных выдач; выдачи откатываются."""
+    user_ids = list(User.objects.filter(role='ученик').values_list('id', flat=True))
+    if not user_ids:
+        raise CommandError('Нет учеников; сначала выполните seed_school')
+    meal_types = [value for value, _ in MealIssued._meta.get_field('meal_type').choices]
+    per_day = len(user_ids) * len(meal_types)
+    # Дни заведомо вне данных seed_school: считаются только добавленные строки
+    first_day = date(2000, 1, 3)
+
+    command.stdout.write(f"{'выдач':>8} {'вариант':<34} {'запросы':>8} {'мс':>9}")
+    for size in options['sizes'] or [1000, 10000, 100000]:
+        last_day = first_day + timedelta(days=(size - 1) // per_day)
+        rows = (
+            MealIssued(user_id=user_id, date=day, meal_type=meal_type)
+            for day in days_between(first_day, last_day)
+            for user_id in user_ids
+            for meal_type in meal_types
+        )
+        with rolled_back():
+            MealIssued.objects.bulk_create([row for row, _ in zip(rows, range(size))], batch_size=5000)
+            total = MealIssued.objects.count()
+            day_counters(first_day)
+            assert compute_counters(first_day, first_day)[first_day] == legacy_day_counters(first_day)
+
+            variants = [
+                ('день, до: отдельные COUNT', lambda: legacy_day_counters(first_day)),
+                ('день, после: один проход', lambda: compute_counters(first_day, first_day)),
+                ('день, после: закрытый день из кэша', lambda: day_counters(first_day)),
+                (f'{(last_day - first_day).days + 1} дн., до: COUNT по дням', lambda: [
+                    legacy_day_counters(day) for day in days_between(first_day, last_day)
+                ]),
+                (f'{(last_day - first_day).days + 1} дн., после: один проход', lambda: compute_counters(first_day, last_day)),
+            ]
+            for name, call in variants:
+                queries, elapsed = median_ms(call)
+                command.stdout.write(f'{size:>8} {name:<34} {queries:>8} {elapsed:>9.2f}')
+        command.stdout.write(f'{size:>8} (всего строк MealIssued: {total})')
+
+
+def asgi_case(command, options):
+    """WSGI (поток на запрос, синхронные представления) против ASGI (цикл событий, async-представления)."""
+    admin = seed_user('admin')
+    headers = {'Authorization': f'Bearer {MyTokenObtainPairSerializer.get_token(admin).access_token}'}
+    today = date.today()
+    paths = [
+        '/api/menu/weekly/',
+        f'/api/paid-students/?date={today}&meal_type=lunch',
+        '/api/admin/stats/',
+        f'/api/admin/reports/daily/?date={today - timedelta(days=1)}',
+    ]
+    wsgi_client = Client()
+    # Заголовки — в каждом запросе: AsyncClient не переносит заданные в конструкторе в ASGI scope
+    asgi_client = AsyncClient()
+
+    def wsgi_get(path):
+        response = wsgi_client.get(path, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+
+    async def asgi_get(path):
+        response = await asgi_client.get(path, headers=headers)
+        assert response.status_code == 200, (path, response.status_code)
+
+    command.stdout.write(f"{'эндпоинт':<28} {'сервер':<6} {'rps':>8} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for path in paths:
+        async_path = path.replace('/api/', '/api/async/', 1)
+        runs = [
+            ('WSGI', hammer(lambda: wsgi_get(path), options['clients'], options['requests'])),
+            ('ASGI', asyncio.run(ahammer(lambda: asgi_get(async_path), options['clients'], options['requests']))),
+        ]
+        for server, (timings, wall) in runs:
+            command.stdout.write(
+                f"{path.split('?')[0]:<28} {server:<6} {len(timings) / wall:>8.1f} "
+                f'{percentile(timings, 50):>7.1f} {percentile(timings, 95):>7.1f} {percentile(timings, 99):>7.1f}'
+            )
+    command.stdout.write(command.style.SUCCESS(
+        f"{options['clients']} клиентов по {options['requests']} запросов (время в мс)"
+    ))
+
+
+def live_feed_case(command, options):
+    """Нагрузка на сервер: панели повара на потоке SSE против панелей, опрашивающих дашборд и список питающихся.
+
+    События публикуются в брокер без записи в базу: запись одинакова в обоих режимах.
+    """
+    cook = seed_user('cook')
+    headers = {'Authorization': f'Bearer {MyTokenObtainPairSerializer.get_token(cook).access_token}'}
+    dashboards, duration, interval = options['clients'], options['duration'], options['interval']
+    today = date.today()
+
+    def polling():
+        client = Client()
+        requests = 0
+        deadline = time.monotonic() + duration
+        try:
+            while time.monotonic() < deadline:
+                for path in ('/api/cook/dashboard/', f'/api/paid-students/?date={today}&meal_type=lunch'):
+                    response = client.get(path, headers=headers)
+                    assert response.status_code == 200, (path, response.status_code)
+                    requests += 1
+                time.sleep(interval)
+        finally:
+            connections.close_all()
+        return requests
+
+    async def streaming():
+        view = LiveFeedView.as_view()
+        delivered = 0
+
+        async def dashboard():
+            nonlocal delivered
+            request = AsyncRequestFactory().get('/api/cook/live/', headers=headers)
+            request.school = current_school()
+            response = await view(request)
+            assert response.status_code == 200, response.status_code
+            async for chunk in response.streaming_content:
+                if chunk.startswith(b'event:'):
+                    delivered += 1
+
+        tasks = [asyncio.create_task(dashboard()) for _ in range(dashboards)]
+        await asyncio.sleep(0.5)  # все панели подписались
+        events = int(duration * options['events_per_second'])
+        for number in range(events):
+            get_broker().publish({
+                'type': 'issued', 'school': current_school(),
+                'data': {'user_id': number, 'date': today, 'meal_type': 'lunch'},
+            })
+            await asyncio.sleep(duration / max(events, 1))
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return events, delivered
+
+    command.stdout.write(
+        f"{'режим':<8} {'панелей':>8} {'HTTP-запросов':>14} {'запросов к БД':>14} {'CPU, с':>8} {'событий':>8} {'доставлено':>11}"
+    )
+    with counting_queries() as counter:
+        started = time.process_time()
+        with ThreadPoolExecutor(max_workers=dashboards) as pool:
+            requests = sum(pool.map(lambda _: polling(), range(dashboards)))
+        cpu = time.process_time() - started
+    command.stdout.write(
+        f"{'опрос':<8} {dashboards:>8} {requests:>14} {counter['queries']:>14} {cpu:>8.2f} {'-':>8} {'-':>11}"
+    )
+    with counting_queries() as counter:
+        started = time.process_time()
+        events, delivered = asyncio.run(streaming())
+        cpu = time.process_time() - started
+    command.stdout.write(
+        f"{'SSE':<8} {dashboards:>8} {dashboards:>14} {counter['queries']:>14} {cpu:>8.2f} {events:>8} {delivered:>11}"
+    )
+    command.stdout.write(command.style.SUCCESS(
+        f'{duration:g} с; опрос каждые {interval:g} с; CPU — всего процесса (клиенты и сервер в одном процессе)'
+    ))
+
+
+def pay_cart_case(command, options):
+    """Оплата корзиной против оплаты по одной позиции: корзины на 1/10/100 позиций, все оплаты откатываются."""
+    students = list(User.objects.filter(role='ученик')[:options['clients']])
+    if not students:
+        raise CommandError('Нет учеников; сначала выполните seed_school')
+    sizes = options['sizes'] or [1, 10, MAX_CART_SIZE]
+    # Даты за пределами данных seed_school: ни одна позиция ещё не оплачена
+    first_day = date.today() + timedelta(days=400)
+    factory = APIRequestFactory()
+    one_view = PayMealView.as_view()
+    cart_view = PayCartView.as_view()
+
+    def post(view, path, user, data):
+        request = factory.post(path, json.dumps(data), content_type='application/json')
+        force_authenticate(request, user=user)
+        response = view(request)
+        assert response.status_code == 200, (response.status_code, response.data)
+        return response
+
+    def one_by_one(items):
+        for user in students:
+            for item in items:
+                post(one_view, '/api/pay-meal/', user, item)
+
+    def cart(items):
+        for user in students:
+            results = post(cart_view, '/api/pay-meal/cart/', user, {'items': items}).data['items']
+            assert all(result['status'] == 'paid' for result in results), results
+
+    command.stdout.write(
+        f"{'позиций':>8} {'вариант':<12} {'запросы/корзина':>16} {'корзин/с':>9} {'позиций/с':>10}"
+    )
+    for size in sizes:
+        items = [
+            {'date': (first_day + timedelta(days=number // 2)).isoformat(), 'meal_type': ('breakfast', 'lunch')[number % 2]}
+            for number in range(size)
+        ]
+        for name, call in (('по одной', one_by_one), ('корзиной', cart)):
+            with rolled_back():
+                queries, elapsed = timed(lambda: call(items))
+            carts = len(students) / (elapsed / 1000)
+            command.stdout.write(
+                f'{size:>8} {name:<12} {queries / len(students):>16.1f} {carts:>9.1f} {carts * size:>10.1f}'
+            )
+    command.stdout.write(command.style.SUCCESS(f'{len(students)} учеников, по одной корзине на ученика'))
+
+
+@contextmanager
+def scratch_database(alias, options):
+    """Временная SQLite-база с настройками профиля options под алиасом alias."""
+    with tempfile.TemporaryDirectory() as directory:
+        connections.settings[alias] = connections.configure_settings({
+            'default': connections.settings['default'],
+            alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': Path(directory) / f'{alias}.sqlite3', **options},
+        })[alias]
+        try:
+            yield alias
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+
+def write_contention(command, options):
+    """Профили SQLite basic и tuned: N писателей делают «проверить и вставить» выдачу, как IssueMealView."""
+    writers, transactions = options['clients'], options['requests']
+
+    def writer(alias, number):
+        committed = locked = 0
+        try:
+            for attempt in range(transactions):
+                user_id = number * transactions + attempt
+                try:
+                    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                        cursor.execute(
+                            'SELECT 1 FROM issued WHERE user_id = %s AND date = %s AND meal_type = %s',
+                            [user_id, '2026-01-12', 'lunch'],
+                        )
+                        if cursor.fetchone() is None:
+                            cursor.execute(
+                                'INSERT INTO issued (user_id, date, meal_type) VALUES (%s, %s, %s)',
+                                [user_id, '2026-01-12', 'lunch'],
+                            )
+                    committed += 1
+                except OperationalError:
+                    # "database is locked": без профиля tuned транзакция просто теряется
+                    locked += 1
+        finally:
+            connections[alias].close()
+        return committed, locked
+
+    command.stdout.write(f"{'профиль':<8} {'писателей':>10} {'зафиксировано':>14} {'locked':>8} {'записей/с':>10}")
+    for profile, profile_options in settings.SQLITE_PROFILES.items():
+        with scratch_database(f'benchmark_{profile}', deepcopy(profile_options)) as alias:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    'CREATE TABLE issued (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                    'date TEXT NOT NULL, meal_type TEXT NOT NULL, UNIQUE (user_id, date, meal_type))'
+                )
+            connections[alias].close()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=writers) as pool:
+                results = list(pool.map(lambda number: writer(alias, number), range(writers)))
+            wall = time.perf_counter() - started
+        committed = sum(committed for committed, _ in results)
+        locked = sum(locked for _, locked in results)
+        command.stdout.write(f'{profile:<8} {writers:>10} {committed:>14} {locked:>8} {committed / wall:>10.1f}')
+    command.stdout.write(command.style.SUCCESS(f'По {transactions} транзакций на писателя, временная база на каждый профиль'))
+
+
+def roster_format(command, options):
+    """Список питающихся в JSON и в столбцах: байты без сжатия и с gzip, время отрисовки и сжатия."""
+    command.stdout.write(
+        f"{'учеников':>9} {'формат':<9} {'байт':>9} {'gzip':>8} {'отрисовка, мс':>14} {'gzip, мс':>9}"
+    )
+    for size in options['sizes'] or [500, 2000, 10000]:
+        # Строки той же формы, что отдаёт roster_users
+        rows = [{'id': number + 1, 'username': f'{PREFIX}ученик_{number}', 'role': 'ученик'} for number in range(size)]
+        for name, renderer in (('json', JSONRenderer()), ('columnar', ColumnarJSONRenderer())):
+            body = renderer.render(rows)
+            compressed = compress_string(body)
+            _, render_ms = median_ms(lambda: renderer.render(rows))
+            _, gzip_ms = median_ms(lambda: compress_string(body))
+            command.stdout.write(
+                f'{size:>9} {name:<9} {len(body):>9} {len(compressed):>8} {render_ms:>14.2f} {gzip_ms:>9.2f}'
+            )
+
+
+def subscription_index(command, options):
+    """Индекс абонементов в памяти против запросов ORM при 10k абонементов; добавленные абонементы откатываются."""
+    user_ids = list(User.objects.filter(role='ученик').values_list('id', flat=True))
+    if not user_ids:
+        raise CommandError('Нет учеников; сначала выполните seed_school')
+    today = date.today()
+    first_day = today - timedelta(days=180)
+    month = days_between(today - timedelta(days=30), today)
+
+    command.stdout.write(f"{'абонементов':>12} {'операция':<28} {'ORM, мс':>9} {'индекс, мс':>11}")
+    for size in options['sizes'] or [10000]:
+        with rolled_back():
+            missing = max(size - Subscription.objects.count(), 0)
+            # bulk_create без сигналов: версию индекса сдвигаем сами
+            Subscription.objects.bulk_create([
+                Subscription(
+                    user_id=user_ids[number % len(user_ids)],
+                    start_date=first_day + timedelta(days=number // len(user_ids) * 31 + number % 17),
+                    end_date=first_day + timedelta(days=number // len(user_ids) * 31 + number % 17 + 30),
+                )
+                for number in range(missing)
+            ], batch_size=5000)
+            invalidate_subscriptions()
+            total = Subscription.objects.count()
+            rows = list(Subscription.objects.values_list('user_id', 'start_date', 'end_date'))
+            index = get_index()
+            user_id = user_ids[0]
+
+            assert index.is_covered(user_id, today) == Subscription.objects.active_on(today).filter(user_id=user_id).exists()
+            assert index.covered_users(today) == set(Subscription.objects.active_on(today).values_list('user_id', flat=True))
+            assert index.active_count(today) == Subscription.objects.active_on(today).count()
+
+            operations = [
+                ('сборка индекса', None, lambda: SubscriptionIndex(rows)),
+                ('is_covered', lambda: Subscription.objects.active_on(today).filter(user_id=user_id).exists(),
+                 lambda: get_index().is_covered(user_id, today)),
+                ('covered_users', lambda: set(Subscription.objects.active_on(today).values_list('user_id', flat=True)),
+                 lambda: get_index().covered_users(today)),
+                ('active_count', lambda: Subscription.objects.active_on(today).count(),
+                 lambda: get_index().active_count(today)),
+                ('active_count за 31 день', lambda: [Subscription.objects.active_on(day).count() for day in month],
+                 # Как compute_counters: версия сверяется один раз на диапазон
+                 lambda: [index.active_count(day) for index in [get_index()] for day in month]),
+            ]
+            for name, orm, indexed in operations:
+                orm_ms = f'{median_ms(orm)[1]:.3f}' if orm else '-'
+                command.stdout.write(f'{total:>12} {name:<28} {orm_ms:>9} {median_ms(indexed)[1]:>11.3f}')
+    command.stdout.write(command.style.SUCCESS('Вызовы индекса включают сверку версии с базой (один запрос)'))
+
+
+def school_year_menu(command, options):
+    """Меню на учебный год: материализация недели, copy_forward на год и чтение недель; записи откатываются."""
+    if not MenuItem.objects.filter(day_of_week__isnull=False).exists():
+        raise CommandError('Нет шаблона меню; сначала выполните seed_school')
+    # Учебный год, на который меню ещё не заводили
+    monday = week_start(date(date.today().year + 2, 9, 1))
+    year_end = date(monday.year + 1, 5, 31)
+    weeks = [monday + timedelta(weeks=number) for number in range((year_end - monday).days // 7 + 1)]
+
+    with rolled_back():
+        assert not DatedMenuItem.objects.filter(date__gte=monday, date__lte=year_end).exists()
+        steps = [
+            ('материализация недели', lambda: materialize(monday, monday + timedelta(days=6))),
+            ('copy_forward на учебный год', lambda: copy_forward(
+                monday, monday + timedelta(days=6), monday + timedelta(days=7), year_end
+            )),
+        ]
+        command.stdout.write(f"{'операция':<36} {'запросы':>8} {'мс':>9}")
+        for name, call in steps:
+            queries, elapsed = timed(call)
+            command.stdout.write(f'{name:<36} {queries:>8} {elapsed:>9.1f}')
+        command.stdout.write(f"Строк меню на год: {DatedMenuItem.objects.filter(date__gte=monday, date__lte=year_end).count()}")
+
+        def cold_week(week):
+            cache.delete(f'weekly_menu:{get_menu_version()}:{week.isoformat()}')
+            get_weekly_menu(week)
+
+        reads = [
+            ('неделя без кэша (сборка меню)', lambda week: cold_week(week)),
+            ('неделя из кэша', lambda week: get_weekly_menu(week)),
+            ('dated_menu за неделю', lambda week: dated_menu(week, week + timedelta(days=6))),
+            ('строки окна 7 дней (запрос)', lambda week: list(dated_rows(week, week + timedelta(days=6)))),
+        ]
+        command.stdout.write(f"{'чтение по всем неделям года':<36} {'запросы':>8} {'p50':>7} {'p99':>7}")
+        for name, read in reads:
+            runs = [timed(lambda: read(week)) for week in weeks]
+            timings = sorted(elapsed for _, elapsed in runs)
+            command.stdout.write(
+                f'{name:<36} {runs[0][0]:>8} {percentile(timings, 50):>7.2f} {percentile(timings, 99):>7.2f}'
+            )
+    command.stdout.write(command.style.SUCCESS(f'{len(weeks)} недель с {monday} по {year_end} (время в мс)'))
+
+
+def schools_case(command, options):
+    """Задержка запросов школы при росте числа школ: временные SQLite-базы школ с данными seed_school."""
+    counts = options['sizes'] or [1, 5, 10, 20]
+    schools = [f'benchmark{number}' for number in range(max(counts))]
+    today = date.today()
+    paths = [
+        f'/api/paid-students/?date={today}&meal_type=lunch',
+        '/api/cook/dashboard/',
+        f'/api/admin/reports/daily/?date={today - timedelta(days=1)}',
+    ]
+
+    with ExitStack() as stack:
+        profile = settings.SQLITE_PROFILES.get(settings.DB_PROFILE, {})
+        for school in schools:
+            stack.enter_context(scratch_database(f'school_{school}', deepcopy(profile)))
+        stack.enter_context(override_settings(SCHOOLS=[*settings.SCHOOLS, *schools]))
+
+        headers = {}
+        for school in schools:
+            command.stdout.write(f'Школа {school}: миграции и seed_school --students {options["students"]}')
+            with use_school(school) as alias:
+                call_command('migrate', database=alias, interactive=False, verbosity=0)
+                call_command('seed_school', students=options['students'], months=1, stdout=StringIO())
+                token = MyTokenObtainPairSerializer.get_token(seed_user('admin')).access_token
+            headers[school] = {'Authorization': f'Bearer {token}', 'X-School': school}
+            connections[f'school_{school}'].close()
+
+        client = Client()
+        # Прогрев: списки питающихся и отчёты каждой школы уже собраны
+        for school in schools:
+            for path in paths:
+                assert client.get(path, headers=headers[school]).status_code == 200, (school, path)
+
+        command.stdout.write(f"{'школ':>5} {'rps':>8} {'p50':>7} {'p95':>7} {'p99':>7}")
+        for count in counts:
+            # Запросы по кругу: школа за школой, эндпоинт за эндпоинтом
+            rotation = itertools.cycle([(school, path) for path in paths for school in schools[:count]])
+            lock = threading.Lock()
+
+            def get():
+                with lock:
+                    school, path = next(rotation)
+                response = client.get(path, headers=headers[school])
+                assert response.status_code == 200, (school, path, response.status_code)
+
+            # Каждый поток сначала проходит все школы: соединения открыты, как у долгоживущего воркера
+            timings, wall = hammer(get, options['clients'], options['requests'], warmup=count * len(paths))
+            command.stdout.write(
+                f'{count:>5} {len(timings) / wall:>8.1f} '
+                f'{percentile(timings, 50):>7.1f} {percentile(timings, 95):>7.1f} {percentile(timings, 99):>7.1f}'
+            )
+    command.stdout.write(command.style.SUCCESS(
+        f"{options['clients']} клиентов по {options['requests']} запросов: {', '.join(path.split('?')[0] for path in paths)} (время в мс)"
+    ))
+
+
+def allergens_case(command, options):
+    """Сопоставление аллергий учеников с блюдами недели: индекс и объединение множеств против перебора."""
+    monday = week_start(date.today())
+    items = dated_menu(monday, monday + timedelta(days=6))
+    if not items:
+        raise CommandError('Нет меню на неделю; сначала выполните seed_school')
+    students = list(User.objects.filter(role='ученик').values_list('id', 'allergies'))
+
+    def naive():
+        # Как без индекса: для каждого блюда разбираем текст аллергий каждого ученика
+        return {
+            (item.date, item.meal_type): {
+                user_id for user_id, allergies in students
+                if parse_ingredients(allergies) & parse_ingredients(item.menu_items)
+            }
+            for item in items
+        }
+
+    def indexed():
+        return affected_users(menu_ingredients(items))
+
+    assert naive() == indexed()
+    factory = APIRequestFactory()
+    cook = seed_user('cook')
+
+    def endpoint():
+        request = factory.get('/api/menu/allergens/')
+        force_authenticate(request, user=cook)
+        assert MenuAllergensView.as_view()(request).status_code == 200
+
+    command.stdout.write(f"{'вариант':<40} {'запросы':>8} {'мс':>9}")
+    for name, call in (
+        ('перебор ученик x блюдо', naive),
+        ('индекс: объединение множеств', indexed),
+        ('GET /api/menu/allergens/', endpoint),
+    ):
+        queries, elapsed = median_ms(call)
+        command.stdout.write(f'{name:<40} {queries:>8} {elapsed:>9.2f}')
+    allergic = sum(1 for _, allergies in students if allergies)
+    command.stdout.write(command.style.SUCCESS(
+        f'{len(students)} учеников ({allergic} с аллергиями), {len(items)} блюд с {monday}; результаты совпадают (медиана из 5)'
+    ))
+
+
+def sync_case(command, options):
+    """Терминал повара без сети: размер и время снимка дня, выгрузка всех выдач дня пачками; записи откатываются."""
+    cook = seed_user('cook')
+    day = date.today()
+    factory = APIRequestFactory()
+    view = CookSyncView.as_view()
+
+    def snapshot():
+        request = factory.get('/api/cook/sync/', {'date': day.isoformat()})
+        force_authenticate(request, user=cook)
+        response = view(request)
+        assert response.status_code == 200, response.data
+        return response.render()
+
+    def upload(issues):
+        summary = Counter()
+        for start in range(0, len(issues), MAX_BATCH_SIZE):
+            request = factory.post(
+                '/api/cook/sync/', json.dumps({'issues': issues[start:start + MAX_BATCH_SIZE]}),
+                content_type='application/json'
+            )
+            force_authenticate(request, user=cook)
+            response = view(request)
+            assert response.status_code == 200, response.data
+            summary.update(response.data['summary'])
+        return summary
+
+    with rolled_back():
+        # Первый снимок дня собирает список питающихся
+        first_queries, first_ms = timed(snapshot)
+        body = snapshot().content
+        data = json.loads(body)
+        issued = {(user_id, meal_type) for meal_type, users in data['issued'].items() for user_id in users}
+        # Выдачи, записанные терминалом без сети: все, кому положено и кто ещё не получил
+        issues = [
+            {'user_id': user_id, 'meal_type': meal_type, 'date': day.isoformat()}
+            for meal_type, users in data['roster'].items() for user_id in users
+            if (user_id, meal_type) not in issued
+        ]
+
+        command.stdout.write(f"{'операция':<36} {'запросы':>8} {'мс':>9}")
+        command.stdout.write(f"{'снимок дня, первый':<36} {first_queries:>8} {first_ms:>9.1f}")
+        queries, elapsed = median_ms(snapshot)
+        command.stdout.write(f"{'снимок дня, повторный':<36} {queries:>8} {elapsed:>9.1f}")
+        summaries = []
+        for name in ('выгрузка выдач', 'повторная выгрузка (дубликаты)'):
+            queries, elapsed = timed(lambda: summaries.append(upload(issues)))
+            command.stdout.write(f'{name:<36} {queries:>8} {elapsed:>9.1f}')
+        assert summaries[0]['issued'] == len(issues) and summaries[1]['already_issued'] == len(issues), summaries
+
+    command.stdout.write(
+        f"Снимок школы на {User.objects.filter(role='ученик').count()} учеников: "
+        f"{len(data['users'])} питающихся, {sum(map(len, data['roster'].values()))} записей в списках, "
+        f"{len(body)} байт, gzip {len(compress_string(body))} байт"
+    )
+    command.stdout.write(command.style.SUCCESS(
+        f'{len(issues)} выдач за {day} пачками по {MAX_BATCH_SIZE}; записи откатываются'
+    ))
+
+
+def purchase_requests(created_by, count, newest):
+    """count заявок с шагом в минуту назад от newest; created_at задаём сами, без auto_now_add."""
+    field = PurchaseRequest._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        PurchaseRequest.objects.bulk_create([
+            PurchaseRequest(
+                product_name=f'Продукт {number % 50}', quantity=number % 20 + 1, unit='кг',
+                status=('pending', 'approved', 'rejected')[number % 3], created_by=created_by,
+                created_at=newest - timedelta(minutes=number),
+            )
+            for number in range(count)
+        ], batch_size=5000)
+    finally:
+        field.auto_now_add = True
+
+
+def pagination_case(command, options):
+    """Страница по ключу против OFFSET: первая, средняя и последняя страница при росте таблицы заявок."""
+    admin = seed_user('admin')
+    cook = seed_user('cook')
+    factory = APIRequestFactory()
+    view = AdminPurchaseRequestsView.as_view()
+    limit = DEFAULT_PAGE_SIZE
+
+    listing = AdminPurchaseRequestsView()
+    listing.request = Request(factory.get('/api/admin/purchase-requests/'))
+
+    def endpoint(cursor):
+        request = factory.get('/api/admin/purchase-requests/', {'cursor': cursor} if cursor else {})
+        force_authenticate(request, user=admin)
+        response = view(request)
+        assert response.status_code == 200 and len(response.data['results']) == limit, response.data
+
+    def keyset(cursor):
+        rows, _ = keyset_page(listing.get_queryset(), cursor, limit)
+        assert len(rows) == limit
+
+    def offset(position):
+        # Как пагинация по номеру страницы: база отсчитывает и отбрасывает position строк
+        rows = list(listing.get_queryset().order_by('-created_at', '-id')[position:position + limit])
+        assert len(rows) == limit
+
+    command.stdout.write(f"{'заявок':>8} {'страница':>9} {'курсор, мс':>11} {'OFFSET, мс':>11} {'GET, мс':>9}")
+    with rolled_back():
+        newest = timezone.now() - timedelta(days=1)
+        for size in options['sizes'] or [1000, 10000, 100000]:
+            missing = size - PurchaseRequest.objects.count()
+            if missing > 0:
+                purchase_requests(cook, missing, newest - timedelta(minutes=PurchaseRequest.objects.count()))
+            total = PurchaseRequest.objects.count()
+            ordered = PurchaseRequest.objects.order_by('-created_at', '-id').values_list('created_at', 'id')
+            last_page = (total - 1) // limit
+            for page in sorted({0, last_page // 2, last_page - 1}):
+                if page * limit + limit > total:
+                    continue
+                # Курсор — последняя строка предыдущей страницы, как его вернул бы ответ
+                cursor = encode_cursor(*ordered[page * limit - 1]) if page else None
+                keyset_ms = median_ms(lambda: keyset(cursor))[1]
+                offset_ms = median_ms(lambda: offset(page * limit))[1]
+                endpoint_ms = median_ms(lambda: endpoint(cursor))[1]
+                command.stdout.write(
+                    f'{total:>8} {page + 1:>9} {keyset_ms:>11.2f} {offset_ms:>11.2f} {endpoint_ms:>9.2f}'
+                )
+    command.stdout.write(command.style.SUCCESS(
+        f'Страницы по {limit} строк той же выборки, что у GET /api/admin/purchase-requests/ (медиана из 5); '
+        'заявки откатываются'
+    ))
+
+
+def metrics_case(command, options):
+    """Накладные расходы InstrumentationMiddleware: метрики выключены, выборка 10% и каждый запрос."""
+    admin = seed_user('admin')
+    headers = {'Authorization': f'Bearer {MyTokenObtainPairSerializer.get_token(admin).access_token}'}
+    today = date.today()
+    paths = [
+        '/api/menu/weekly/',
+        f'/api/paid-students/?date={today}&meal_type=lunch',
+        f'/api/admin/reports/daily/?date={today - timedelta(days=1)}',
+    ]
+    variants = [
+        ('выключены', {'METRICS_ENABLED': False}),
+        ('выборка 0.1', {'METRICS_ENABLED': True, 'METRICS_SAMPLE_RATE': 0.1}),
+        ('выборка 1.0', {'METRICS_ENABLED': True, 'METRICS_SAMPLE_RATE': 1.0}),
+    ]
+    client = Client()
+    rounds = max(options['requests'] // 50, 1)
+
+    command.stdout.write(f"{'эндпоинт':<28} {'метрики':<12} {'p50':>7} {'p95':>7} {'p99':>7} {'+p50, мкс':>10}")
+    for path in paths:
+        def get():
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code)
+
+        get()
+        # Варианты чередуются короткими сериями, чтобы дрейф машины ложился на все поровну
+        timings = {name: [] for name, _ in variants}
+        for _ in range(rounds):
+            for name, overrides in variants:
+                with override_settings(**overrides):
+                    for _ in range(50):
+                        started = time.perf_counter()
+                        get()
+                        timings[name].append(1000 * (time.perf_counter() - started))
+        baseline = percentile(sorted(timings[variants[0][0]]), 50)
+        for name, _ in variants:
+            runs = sorted(timings[name])
+            p50 = percentile(runs, 50)
+            command.stdout.write(
+                f"{path.split('?')[0]:<28} {name:<12} {p50:>7.2f} {percentile(runs, 95):>7.2f} "
+                f"{percentile(runs, 99):>7.2f} {1000 * (p50 - baseline):>10.0f}"
+            )
+    command.stdout.write(command.style.SUCCESS(
+        f"По {rounds * 50} запросов на вариант из одного клиента, сериями по 50 вперемешку "
+        f"(время в мс, прибавка p50 — к выключенным метрикам)"
+    ))
+
+DEFAULTS = {
+    'live-feed': {'clients': 50},
+    'pay-cart': {'clients': 20},
+    'write-contention': {'clients': 16, 'requests': 200},
+    'schools': {'clients': 10, 'requests': 60},
+    'metrics': {'requests': 2000},
+}
+
+
+CASES = {
+    'weekly-menu': weekly_menu,
+    'issue-batch': issue_batch,
+    'day-counters': day_counters_case,
+    'wsgi-asgi': asgi_case,
+    'live-feed': live_feed_case,
+    'pay-cart': pay_cart_case,
+    'write-contention': write_contention,
+    'roster-format': roster_format,
+    'subscription-index': subscription_index,
+    'school-year-menu': school_year_menu,
+    'schools': schools_case,
+    'allergens': allergens_case,
+    'sync': sync_case,
+    'pagination': pagination_case,
+    'metrics': metrics_case,
+}
+
+
+class Command(BaseCommand):
+    help = 'Замеры «до/после» для оптимизаций (запросы к базе, p50/p95/p99) на данных seed_school, без сервера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('case', choices=CASES)
+        parser.add_argument(
+            '--clients', type=int,
+            help='Параллельных клиентов (по умолчанию 200; live-feed — 50 панелей, pay-cart — 20 учеников, '
+                 'write-contention — 16 писателей)'
+        )
+        parser.add_argument('--requests', type=int, help='Запросов на клиента (по умолчанию 5, write-contention — 200)')
+        parser.add_argument('--sizes', type=int, nargs='+', help='Размеры пачек/объёмы данных вместо стандартных')
+        parser.add_argument('--students', type=int, default=300, help='schools: учеников в каждой временной школе')
+        parser.add_argument('--duration', type=float, default=10, help='live-feed: длительность прогона, с')
+        parser.add_argument('--interval', type=float, default=2, help='live-feed: период опроса, с')
+        parser.add_argument('--events-per-second', type=float, default=5, help='live-feed: событий в секунду')
+
+    def handle(self, *args, **options):
+        for name, default in {'clients': 200, 'requests': 5, **DEFAULTS.get(options['case'], {})}.items():
+            if options[name] is None:
+                options[name] = default
+        CASES[options['case']](self, options)
+
+    def report(self, variants, options):
+        """variants — [(название, вызов, запросов к базе на вызов)]; каждый вызов гоняется под нагрузкой."""
+        self.stdout.write(
+            f"{'вариант':<36} {'запросы':>8} {'rps':>8} {'p50':>7} {'p95':>7} {'p99':>7}"
+        )
+        for name, call, queries in variants:
+            timings, wall = hammer(call, options['clients'], options['requests'])
+            self.stdout.write(
+                f'{name:<36} {queries:>8} {len(timings) / wall:>8.1f} '
+                f'{percentile(timings, 50):>7.1f} {percentile(timings, 95):>7.1f} {percentile(timings, 99):>7.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['clients']} клиентов по {options['requests']} запросов (время в мс)"
+        ))
@@ -0,0 +1,85 @@
+import re
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.issuing import issued_rows
+from api.menu import dated_rows, week_start
+from api.models import User
+from api.pagination import encode_cursor, keyset_filter
+from api.payments import user_payments
+from api.reports import issued_counts, payment_counts
+from api.roster import eligibility, paid_user_ids, roster_users
+from api.tenancy import current_db
+from api.views import AdminPurchaseRequestsView, CookDashboardView, UserReviewsView
+
+
+# SQLite: "SCAN api_mealpayment", PostgreSQL: "Seq Scan on api_mealpayment"
+TABLE_SCAN_RE = re.compile(r'\bSCAN (api_\w+)|Seq Scan on (api_\w+)')
+
+
+def table_scans(plan):
+    """Таблицы api_*, которые план читает целиком."""
+    return [a or b for a, b in TABLE_SCAN_RE.findall(plan)]
+
+
+def view_queryset(view_class, user, params=None):
+    """get_queryset() представления для запроса с параметрами params от имени user."""
+    view = view_class()
+    view.request = Request(APIRequestFactory().get('/', params or {}))
+    view.request.user = user
+    view.format_kwarg = None
+    return view.get_queryset()
+
+
+def hot_queries(day, user_id=1):
+    """Запросы горячих путей, собранные теми же функциями, что вызывают представления."""
+    user = User(id=user_id)
+    monday = week_start(day)
+    cursor = encode_cursor(timezone.now(), 1)
+    return {
+        'WeeklyMenuView': dated_rows(monday, monday + timedelta(days=6)),
+        'CookDashboardView (заявки)': view_queryset(CookDashboardView, user),
+        'PayCartView': user_payments(user, [day, day + timedelta(days=1)]),
+        'PaidStudentsView': roster_users(day, 'lunch'),
+        'PaidStudentsView (сборка: оплаты)': paid_user_ids(day, 'lunch'),
+        'ScanMealView (право)': eligibility(day, 'lunch', [user_id]),
+        'IssueMealsBatchView (выдачи)': issued_rows([user_id], [day]),
+        'AdminStatsView (выдачи)': issued_counts(day, day),
+        'AdminStatsView (оплаты)': payment_counts(day, day),
+        'AdminPurchaseRequestsView': keyset_filter(
+            view_queryset(AdminPurchaseRequestsView, user, {'status': 'pending'}), cursor
+        ),
+        'UserReviewsView': keyset_filter(view_queryset(UserReviewsView, user), cursor),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет через EXPLAIN, что горячие запросы представлений используют индексы, '
+        'а не полный просмотр таблиц. На PostgreSQL запускайте на наполненной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы целиком')
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, queryset in hot_queries(date.today()).items():
+            plan = queryset.explain()
+            scanned = table_scans(plan)
+            if scanned:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: полный просмотр {", ".join(scanned)}'))
+            else:
+                self.stdout.write(f'{name}: OK')
+            if options['verbose_plans'] or scanned:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'Запросы без индекса ({connections[current_db()].vendor}): {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Все горячие запросы используют индексы'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.menu import copy_forward, materialize
+from .rebuild_roster import parse_date
+
+
+class Command(BaseCommand):
+    help = 'Заполняет календарь меню на период: из шаблона недели или копией меню других дат'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', required=True, help='Начало периода (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', required=True, help='Конец периода (YYYY-MM-DD)')
+        parser.add_argument('--source-from', help='Начало образца; без него меню берётся из шаблона недели')
+        parser.add_argument('--source-to', help='Конец образца (лучше целое число недель)')
+        parser.add_argument('--replace', action='store_true', help='Перезаписать уже заполненные даты периода')
+
+    def handle(self, *args, **options):
+        date_from, date_to = parse_date(options['date_from']), parse_date(options['date_to'])
+        if date_to < date_from:
+            raise CommandError('--to раньше --from')
+
+        if not options['source_from']:
+            if options['replace']:
+                raise CommandError('--replace работает только вместе с --source-from/--source-to')
+            created = materialize(date_from, date_to)
+        else:
+            if not options['source_to']:
+                raise CommandError('Укажите --source-to')
+            source_from, source_to = parse_date(options['source_from']), parse_date(options['source_to'])
+            if source_to < source_from:
+                raise CommandError('--source-to раньше --source-from')
+            if source_from <= date_to and date_from <= source_to:
+                raise CommandError('Период образца пересекается с заполняемым')
+            created = copy_forward(source_from, source_to, date_from, date_to, replace=options['replace'])
+
+        self.stdout.write(self.style.SUCCESS(f'Строк меню на даты: {created}'))
@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.forecast import PORTION_MEAL_TYPES, apply_quantities, draft_purchase_requests, forecast_day
+from api.models import User
+from .rebuild_roster import parse_date
+
+
+class Command(BaseCommand):
+    help = 'Прогноз порций на день по истории выдач; может выставить остатки и создать черновые заявки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Дата прогноза (по умолчанию завтра)')
+        parser.add_argument('--apply', action='store_true', help='Выставить available_quantity блюдам дня')
+        parser.add_argument('--draft-purchases', action='store_true', help='Создать заявки на закупку (pending)')
+        parser.add_argument('--user', help='Автор заявок (по умолчанию первый суперпользователь)')
+
+    def handle(self, *args, **options):
+        target_date = parse_date(options['date']) if options['date'] else date.today() + timedelta(days=1)
+        forecast = forecast_day(target_date)
+
+        for meal_type in PORTION_MEAL_TYPES:
+            self.stdout.write(
+                f"{target_date} {meal_type}: прогноз {forecast[meal_type]['predicted']}, "
+                f"уже записано {forecast[meal_type]['enrolled']}"
+            )
+
+        if options['apply']:
+            changed = apply_quantities(forecast)
+            self.stdout.write(self.style.SUCCESS(f'Обновлено блюд: {len(changed)}'))
+
+        if options['draft_purchases']:
+            if options['user']:
+                user = User.objects.filter(username=options['user']).first()
+            else:
+                user = User.objects.filter(is_superuser=True).order_by('id').first()
+            if user is None:
+                raise CommandError('Не найден автор заявок, укажите --user')
+            created = draft_purchase_requests(forecast, user)
+            self.stdout.write(self.style.SUCCESS(f'Создано заявок: {len(created)}'))
@@ -0,0 +1,193 @@
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import User
+from .seed_school import PREFIX
+
+
+class Client:
+    """Минимальный HTTP-клиент на urllib: JWT, JSON и замер времени каждого запроса."""
+
+    def __init__(self, base_url, timeout, results):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.results = results
+        self.token = None
+        self.etags = {}
+
+    def request(self, method, path, name=None, data=None):
+        headers = {'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+
+        started = time.perf_counter()
+        payload = None
+        try:
+            with urlopen(Request(self.base_url + path, data=body, headers=headers, method=method), timeout=self.timeout) as response:
+                status = response.status
+                raw = response.read()
+                if response.headers.get('ETag'):
+                    self.etags[path] = response.headers['ETag']
+        except HTTPError as error:
+            status = error.code
+            raw = error.read()
+        except (URLError, OSError):
+            status = None
+            raw = b''
+        elapsed = time.perf_counter() - started
+
+        self.results.append((name or f"{method} {path.split('?')[0]}", status, elapsed, len(raw)))
+        if raw and status and status < 300:
+            try:
+                payload = json.loads(raw)
+            except ValueError:
+                pass
+        return status, payload
+
+    def get(self, path, name=None):
+        return self.request('GET', path, name)
+
+    def post(self, path, data, name=None):
+        return self.request('POST', path, name, data)
+
+    def login(self, username, password):
+        status, payload = self.post('/api/token/', {'username': username, 'password': password})
+        if status != 200:
+            raise CommandError(f'Не удалось войти как {username} (HTTP {status})')
+        self.token = payload['access']
+
+
+def student_morning_rush(client, rng, today):
+    client.get('/api/menu/weekly/')
+    client.get('/api/menu/weekly/safe/')
+    client.get('/api/user/me/')
+    day = today + timedelta(days=rng.randint(1, 14))
+    client.post('/api/pay-meal/', {'date': day.isoformat(), 'meal_type': rng.choice(('breakfast', 'lunch', 'combined'))})
+    client.get('/api/user/reviews/')
+    if rng.random() < 0.2:
+        client.post('/api/reviews/', {
+            'date': today.isoformat(), 'meal_type': rng.choice(('breakfast', 'lunch')),
+            'rating': rng.randint(1, 5), 'comment': 'Нагрузочный тест',
+        })
+
+
+def cook_serving_line(client, rng, today):
+    meal_type = rng.choice(('breakfast', 'lunch', 'combined'))
+    client.get('/api/cook/dashboard/')
+    _, students = client.get(f'/api/paid-students/?date={today}&meal_type={meal_type}', 'GET /api/paid-students/')
+    students = students or []
+    if students:
+        client.post('/api/cook/issue-meal-for-user/', {
+            'user_id': rng.choice(students)['id'], 'meal_type': meal_type, 'date': today.isoformat(),
+        })
+        client.post('/api/cook/issue-meals/', {'items': [
+            {'user_id': student['id'], 'meal_type': meal_type, 'date': today.isoformat()}
+            for student in rng.sample(students, min(20, len(students)))
+        ]})
+    client.get(f'/api/cook/sync/?date={today}', 'GET /api/cook/sync/')
+
+
+def admin_reporting(client, rng, today):
+    month_ago = today - timedelta(days=30)
+    client.get('/api/admin/stats/')
+    day = today - timedelta(days=rng.randint(0, 30))
+    client.get(f'/api/admin/reports/daily/?date={day}', 'GET /api/admin/reports/daily/')
+    client.get(f'/api/admin/reports/range/?date_from={month_ago}&date_to={today}', 'GET /api/admin/reports/range/')
+    client.get('/api/admin/purchase-requests/')
+    client.get('/api/admin/forecast/')
+    client.get('/api/menu/allergens/')
+    client.get(f'/api/admin/export/payments/?date_from={day}&date_to={day}', 'GET /api/admin/export/<kind>/')
+
+
+SCENARIOS = {
+    'morning-rush': ('ученик', student_morning_rush),
+    'serving-line': ('cook', cook_serving_line),
+    'admin-reporting': ('admin', admin_reporting),
+}
+
+
+def percentile(values, q):
+    """Перцентиль по ближайшему рангу; values отсортированы."""
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочные сценарии (утренний наплыв учеников, линия раздачи, отчёты) против запущенного сервера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--scenario', choices=['all', *SCENARIOS], default='all')
+        parser.add_argument('--users', type=int, default=20, help='Виртуальных пользователей на сценарий')
+        parser.add_argument('--iterations', type=int, default=10, help='Проходов сценария на пользователя')
+        parser.add_argument('--password', default='password', help='Пароль пользователей seed_school')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS if options['scenario'] == 'all' else {options['scenario']: SCENARIOS[options['scenario']]}
+        results = []
+        today = date.today()
+
+        # Поваров и администраторов в школе мало — виртуальные пользователи делят их учётные записи
+        accounts = {role: User.objects.filter(username__startswith=f'{PREFIX}{role}_').count() for role, _ in scenarios.values()}
+        missing = [role for role, count in accounts.items() if not count]
+        if missing:
+            raise CommandError(f"Нет пользователей {PREFIX}* с ролями {', '.join(missing)}; сначала выполните seed_school")
+
+        def virtual_user(scenario, role, number):
+            rng = random.Random(f"{options['seed']}:{scenario}:{number}")
+            client = Client(options['base_url'], options['timeout'], results)
+            client.login(f'{PREFIX}{role}_{number % accounts[role]}', options['password'])
+            for _ in range(options['iterations']):
+                SCENARIOS[scenario][1](client, rng, today)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['users'] * len(scenarios)) as pool:
+            futures = [
+                pool.submit(virtual_user, scenario, role, number)
+                for scenario, (role, _) in scenarios.items()
+                for number in range(options['users'])
+            ]
+            for future in futures:
+                future.result()
+        wall = time.perf_counter() - started
+
+        self.report(results, wall)
+
+    def report(self, results, wall):
+        by_endpoint = defaultdict(list)
+        for name, status, elapsed, size in results:
+            by_endpoint[name].append((status, elapsed, size))
+
+        self.stdout.write(
+            f"{'endpoint':<44} {'n':>6} {'rps':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'4xx':>5} {'err':>5} {'KB':>7}"
+        )
+        for name in sorted(by_endpoint):
+            rows = by_endpoint[name]
+            times = sorted(1000 * elapsed for _, elapsed, _ in rows)
+            client_errors = sum(1 for status, _, _ in rows if status and 400 <= status < 500)
+            errors = sum(1 for status, _, _ in rows if not status or status >= 500)
+            size = sum(size for _, _, size in rows) / len(rows) / 1024
+            self.stdout.write(
+                f'{name:<44} {len(rows):>6} {len(rows) / wall:>7.1f} '
+                f'{percentile(times, 50):>7.1f} {percentile(times, 95):>7.1f} {percentile(times, 99):>7.1f} '
+                f'{client_errors:>5} {errors:>5} {size:>7.1f}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего {len(results)} запросов за {wall:.1f} с: {len(results) / wall:.1f} запросов/с (время в мс)'
+        ))
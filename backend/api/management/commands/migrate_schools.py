@@ -0,0 +1,30 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.tenancy import school_databases, use_school
+
+
+class Command(BaseCommand):
+    help = 'Применяет миграции к базам всех школ (SCHOOLS и DEFAULT_SCHOOL) или одной школы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--school', help='Только эта школа')
+
+    def handle(self, *args, **options):
+        schools = school_databases()
+        if options['school']:
+            if options['school'] not in schools:
+                raise CommandError(f"Неизвестная школа: {options['school']}")
+            schools = {options['school']: schools[options['school']]}
+
+        for school, alias in schools.items():
+            connection = connections[alias]
+            if connection.vendor == 'postgresql' and alias != 'default':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {connection.ops.quote_name(school)}')
+
+            self.stdout.write(f'Школа {school} (база {alias})')
+            # Сигналы и RunPython-миграции ходят через роутер — он должен смотреть в ту же базу
+            with use_school(school):
+                call_command('migrate', database=alias, interactive=False, verbosity=options['verbosity'])
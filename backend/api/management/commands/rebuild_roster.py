@@ -0,0 +1,45 @@
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.roster import ROSTER_MEAL_TYPES, build_roster, check_roster, date_range
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Неверный формат даты: {value} (ожидается YYYY-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает списки питающихся (MealEligibility) или сверяет их с MealPayment и Subscription'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Первая дата (по умолчанию сегодня)')
+        parser.add_argument('--to', dest='date_to', help='Последняя дата (по умолчанию равна --from)')
+        parser.add_argument('--check', action='store_true', help='Только сверить построенные дни, ничего не меняя')
+
+    def handle(self, *args, **options):
+        date_from = parse_date(options['date_from']) if options['date_from'] else date.today()
+        date_to = parse_date(options['date_to']) if options['date_to'] else date_from
+        if date_to < date_from:
+            raise CommandError('--to раньше --from')
+
+        if options['check']:
+            problems = check_roster(date_from, date_to)
+            for problem in problems:
+                self.stdout.write(
+                    f"{problem['date']} {problem['meal_type']}: "
+                    f"нет в списке {problem['missing']}, лишние {problem['extra']}"
+                )
+            if problems:
+                raise CommandError(f'Найдено расхождений: {len(problems)}')
+            self.stdout.write(self.style.SUCCESS('Списки совпадают с оплатами и абонементами'))
+            return
+
+        for day in date_range(date_from, date_to):
+            for meal_type in ROSTER_MEAL_TYPES:
+                user_ids = build_roster(day, meal_type)
+                self.stdout.write(f'{day} {meal_type}: {len(user_ids)}')
+        self.stdout.write(self.style.SUCCESS('Списки пересобраны'))
@@ -0,0 +1,254 @@
+import random
+import time
+from datetime import date, datetime, time as day_time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from api.allergens import index_menu_item, ingredient_ids, parse_ingredients
+from api.models import (
+    Ingredient, User, MenuItem, MealPayment, Subscription, MealIssued, Review, PurchaseRequest, MealEligibility,
+    PaymentIdempotencyKey
+)
+from api.reports import invalidate_days
+from api.roster import invalidate_roster
+from api.subscriptions import invalidate_subscriptions
+from api.rollups import backfill, meal_prices
+from api.tenancy import current_db
+from .rebuild_roster import parse_date
+
+
+PREFIX = 'seed_'
+INGREDIENTS = [
+    'молоко', 'яйца', 'пшеница', 'овсянка', 'гречка', 'рис', 'курица', 'говядина', 'рыба', 'сыр',
+    'творог', 'картофель', 'морковь', 'капуста', 'томат', 'огурец', 'яблоко', 'мед', 'орехи', 'какао',
+    'чай', 'хлеб', 'масло', 'сметана', 'горох', 'свекла', 'лук', 'ягоды', 'соя', 'арахис',
+]
+ALLERGENS = ['молоко', 'яйца', 'орехи', 'арахис', 'мед', 'рыба', 'пшеница', 'соя', 'какао']
+COMMENTS = ['Вкусно', 'Остыло', 'Мало порции', 'Отлично', 'Пересолено', 'Нормально', 'Спасибо поварам']
+PRODUCTS = [('Молоко', 'л'), ('Мука', 'кг'), ('Яйца', 'шт'), ('Курица', 'кг'), ('Картофель', 'кг'), ('Сахар', 'кг')]
+
+
+class Command(BaseCommand):
+    help = 'Генерирует синтетическую школу (пользователи, меню, оплаты, абонементы, выдачи, отзывы, заявки)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--cooks', type=int, default=10)
+        parser.add_argument('--admins', type=int, default=3)
+        parser.add_argument('--months', type=int, default=3, help='Сколько месяцев истории до --end')
+        parser.add_argument('--end', help='Последний день истории (по умолчанию сегодня)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--chunk', type=int, default=1000, help='Размер пачки bulk_create')
+        parser.add_argument('--password', default='password', help='Пароль всех созданных пользователей')
+        parser.add_argument('--reset', action='store_true', help=f'Удалить ранее созданных пользователей {PREFIX}*')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk = options['chunk']
+        date_to = parse_date(options['end']) if options['end'] else date.today()
+        date_from = date_to - timedelta(days=30 * options['months'])
+
+        started = time.perf_counter()
+        if User.objects.filter(username__startswith=PREFIX).exists():
+            if not options['reset']:
+                raise CommandError(f'Пользователи {PREFIX}* уже есть, запустите с --reset')
+            old_from, old_to = self.reset()
+            # Сводки за прежний период тоже пересчитываем — там удалены данные
+            rollup_from, rollup_to = min(old_from or date_from, date_from), max(old_to or date_to, date_to)
+        else:
+            rollup_from, rollup_to = date_from, date_to
+
+        with transaction.atomic(using=current_db()):
+            students, cooks, admins = self.create_users(options)
+            self.create_menu()
+            subscriptions = self.create_subscriptions(students, date_from, date_to)
+            payments = self.create_payments(students, subscriptions, date_from, date_to)
+            self.create_issued(payments, subscriptions, date_from, min(date_to, date.today()))
+            self.create_reviews(students, date_from, date_to)
+            self.create_purchase_requests(cooks, date_from, date_to)
+
+        # Абонементы, начатые в конце истории, действуют до 30 дней после --end:
+        # сводки за эти дни тоже нужны, иначе сигналы начнут их с нуля
+        rollup_to = max([rollup_to, *(s.end_date for s in subscriptions)])
+
+        # bulk_create обходит сигналы — пересобираем производные данные явно
+        invalidate_subscriptions()
+        invalidate_roster(rollup_from, rollup_to)
+        invalidate_days(rollup_from, rollup_to)
+        backfill(rollup_from, rollup_to)
+        self.stdout.write(self.style.SUCCESS(
+            f'Школа создана за {time.perf_counter() - started:.1f} с ({date_from} — {date_to})'
+        ))
+
+    def reset(self):
+        """Удаляет созданных ранее пользователей и их данные; возвращает прежний период истории.
+
+        Обычный delete() отправил бы сигналы для каждой из сотен тысяч строк,
+        поэтому зависимые таблицы чистим одним DELETE на таблицу.
+        """
+        users = User.objects.filter(username__startswith=PREFIX)
+        bounds = [
+            MealPayment.objects.filter(user__in=users).aggregate(first=Min('date'), last=Max('date')),
+            Subscription.objects.filter(user__in=users).aggregate(first=Min('start_date'), last=Max('end_date')),
+        ]
+        with transaction.atomic(using=current_db()):
+            for model, field in (
+                (MealIssued, 'user'), (MealPayment, 'user'), (PaymentIdempotencyKey, 'user'), (Subscription, 'user'),
+                (Review, 'user'), (PurchaseRequest, 'created_by'), (MealEligibility, 'user'),
+                (User.allergens.through, 'user'),
+            ):
+                queryset = model.objects.filter(**{f'{field}__in': users.values('id')})
+                queryset._raw_delete(queryset.db)
+            users.delete()
+        self.stdout.write(f'Удалены прежние пользователи {PREFIX}*')
+        return (
+            min((b['first'] for b in bounds if b['first']), default=None),
+            max((b['last'] for b in bounds if b['last']), default=None),
+        )
+
+    def bulk(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.chunk)
+        self.stdout.write(f'{model.__name__}: {len(objects)}')
+
+    def bulk_dated(self, model, objects, created):
+        """bulk для моделей с auto_now_add: created_at при вставке всегда «сейчас»,
+        поэтому дату создания из истории проставляем вторым проходом."""
+        self.bulk(model, objects)
+        for obj, created_at in zip(objects, created):
+            obj.created_at = created_at
+        model.objects.bulk_update(objects, ['created_at'], batch_size=self.chunk)
+
+    def moment(self, day, first_hour, last_hour):
+        return timezone.make_aware(datetime.combine(
+            day, day_time(self.rng.randint(first_hour, last_hour), self.rng.randint(0, 59), self.rng.randint(0, 59))
+        ))
+
+    def create_users(self, options):
+        # Один хэш на всех: хэширование пароля для тысяч пользователей заняло бы минуты
+        password = make_password(options['password'])
+        users = []
+        for role, count in (('ученик', options['students']), ('cook', options['cooks']), ('admin', options['admins'])):
+            for i in range(count):
+                allergies = ''
+                if role == 'ученик' and self.rng.random() < 0.2:
+                    allergies = ', '.join(self.rng.sample(ALLERGENS, self.rng.randint(1, 3)))
+                users.append(User(
+                    username=f'{PREFIX}{role}_{i}', password=password, role=role, allergies=allergies,
+                    is_staff=role == 'admin'
+                ))
+        self.bulk(User, users)
+
+        users = list(User.objects.filter(username__startswith=PREFIX).order_by('id'))
+        self.index_allergies(users)
+        return (
+            [u for u in users if u.role == 'ученик'],
+            [u for u in users if u.role == 'cook'],
+            [u for u in users if u.role == 'admin'],
+        )
+
+    def index_allergies(self, users):
+        parsed = {user.pk: parse_ingredients(user.allergies) for user in users if user.allergies}
+        names = set().union(*parsed.values())
+        ingredient_ids(names)
+        ids = dict(Ingredient.objects.filter(name__in=names).values_list('name', 'id'))
+        Link = User.allergens.through
+        Link.objects.bulk_create(
+            [Link(user_id=pk, ingredient_id=ids[name]) for pk, found in parsed.items() for name in found],
+            batch_size=self.chunk
+        )
+
+    def create_menu(self):
+        created = 0
+        for day_of_week in range(1, 8):
+            for meal_type, price in (('breakfast', 90), ('lunch', 150)):
+                item, was_created = MenuItem.objects.get_or_create(
+                    day_of_week=day_of_week, meal_type=meal_type,
+                    defaults={
+                        'menu_items': ', '.join(self.rng.sample(INGREDIENTS, 5)),
+                        'price': price,
+                        'available_quantity': 500,
+                    }
+                )
+                created += was_created
+                index_menu_item(item)
+        self.stdout.write(f'MenuItem: {created}')
+
+    def create_subscriptions(self, students, date_from, date_to):
+        subscriptions = []
+        for student in students:
+            if self.rng.random() >= 0.25:
+                continue
+            start = date_from + timedelta(days=self.rng.randint(0, 29))
+            while start <= date_to:
+                subscriptions.append(Subscription(user=student, start_date=start, end_date=start + timedelta(days=30)))
+                start += timedelta(days=31)
+        self.bulk(Subscription, subscriptions)
+        return subscriptions
+
+    def create_payments(self, students, subscriptions, date_from, date_to):
+        subscribed = {s.user_id for s in subscriptions}
+        payers = [s for s in students if s.pk not in subscribed]
+        prices = meal_prices(date_from, date_to)
+        payments = []
+        for day in school_days(date_from, date_to):
+            for student in payers:
+                roll = self.rng.random()
+                meal_type = 'breakfast' if roll < 0.12 else 'lunch' if roll < 0.30 else 'combined' if roll < 0.38 else None
+                if meal_type:
+                    payments.append(MealPayment(user=student, date=day, meal_type=meal_type, amount=prices[day, meal_type]))
+        self.bulk(MealPayment, payments)
+        return payments
+
+    def create_issued(self, payments, subscriptions, date_from, date_to):
+        issued = []
+        for payment in payments:
+            if payment.date <= date_to and self.rng.random() < 0.93:
+                issued.append(MealIssued(user_id=payment.user_id, date=payment.date, meal_type=payment.meal_type))
+        for subscription in subscriptions:
+            for day in school_days(max(subscription.start_date, date_from), min(subscription.end_date, date_to)):
+                if self.rng.random() < 0.9:
+                    issued.append(MealIssued(user_id=subscription.user_id, date=day, meal_type='combined'))
+        self.bulk(MealIssued, issued)
+
+    def create_reviews(self, students, date_from, date_to):
+        days = list(school_days(date_from, date_to))
+        reviews = [
+            Review(
+                user=student,
+                date=self.rng.choice(days),
+                meal_type=self.rng.choice(('breakfast', 'lunch')),
+                rating=self.rng.randint(1, 5),
+                comment=self.rng.choice(COMMENTS),
+            )
+            for student in students if self.rng.random() < 0.3
+            for _ in range(self.rng.randint(1, 4))
+        ]
+        # Отзыв оставляют в день питания после еды
+        self.bulk_dated(Review, reviews, [self.moment(review.date, 9, 17) for review in reviews])
+
+    def create_purchase_requests(self, cooks, date_from, date_to):
+        requests, created = [], []
+        for day in school_days(date_from, date_to):
+            for _ in range(self.rng.randint(0, 3)):
+                product, unit = self.rng.choice(PRODUCTS)
+                requests.append(PurchaseRequest(
+                    product_name=product,
+                    quantity=self.rng.randint(5, 200),
+                    unit=unit,
+                    status=self.rng.choice(('pending', 'approved', 'approved', 'rejected')),
+                    created_by=self.rng.choice(cooks),
+                ))
+                created.append(self.moment(day, 7, 15))
+        self.bulk_dated(PurchaseRequest, requests, created)
+
+
+def school_days(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        if day.isoweekday() <= 5:
+            yield day
+        day += timedelta(days=1)
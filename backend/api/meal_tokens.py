@@ -0,0 +1,34 @@
+# api/meal_tokens
+# Талон на питание для QR-кода: id ученика, дата и школа, подписанные SECRET_KEY
+# с меткой времени. Проверка подписи не обращается к базе.
+from datetime import date
+
+from django.conf import settings
+from django.core import signing
+
+from .tenancy import current_school
+
+
+SALT = 'api.meal-token'
+
+
+def make_token(user_id, username, day=None):
+    day = day or date.today()
+    return signing.dumps({'u': user_id, 'n': username, 'd': day.isoformat(), 's': current_school()}, salt=SALT)
+
+
+def read_token(token):
+    """Возвращает (user_id, username, дата); просроченный или чужой талон — ValueError."""
+    if not isinstance(token, str):
+        raise ValueError('Недействительный талон')
+    try:
+        payload = signing.loads(token, salt=SALT, max_age=settings.MEAL_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        raise ValueError('Талон просрочен, обновите QR-код')
+    except signing.BadSignature:
+        raise ValueError('Недействительный талон')
+    if payload.get('s') != current_school():
+        raise ValueError('Талон выдан в другой школе')
+    if payload.get('d') != date.today().isoformat():
+        raise ValueError('Талон выдан на другой день')
+    return payload['u'], payload['n'], date.fromisoformat(payload['d'])
@@ -0,0 +1,244 @@
+# api/menu
+# MenuItem — шаблон недели (день недели + приём пищи), DatedMenuItem — меню на дату
+# со своим остатком. Строки на даты создаются из шаблона при первом открытии панели
+# повара или заранее копированием (copy_forward) на неделю, четверть, год; публичное
+# чтение недели подставляет незаполненные даты из шаблона, ничего не записывая.
+from datetime import date, datetime, timedelta
+from hashlib import sha256
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from .models import MenuItem, DatedMenuItem
+from .reports import days_between
+from .serializers import DatedMenuItemSerializer
+from .tenancy import current_db
+from .versions import aget_version, bump_versions, get_version
+
+
+# Версия меню хранится в базе: правку меню или списание порций в одном процессе
+# видят все остальные, а не только тот, чей локальный кэш был сброшен
+MENU_VERSION = 'menu'
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+MENU_MEAL_TYPES = ('breakfast', 'lunch')
+
+
+def get_menu_version():
+    return get_version(MENU_VERSION)
+
+
+async def aget_menu_version():
+    return await aget_version(MENU_VERSION)
+
+
+def invalidate_weekly_menu():
+    # Новая версия делает все ранее закэшированные варианты меню недоступными
+    bump_versions([MENU_VERSION])
+
+
+def week_start(day):
+    return day - timedelta(days=day.isoweekday() - 1)
+
+
+MENU_MAX_YEARS = 5
+
+
+def check_menu_date(day):
+    """Даты меню дальше MENU_MAX_YEARS лет от сегодня отклоняем (ValueError)."""
+    today = date.today()
+    limit = timedelta(days=366 * MENU_MAX_YEARS)
+    if not today - limit <= day <= today + limit:
+        raise ValueError(f'Дата меню должна быть не дальше {MENU_MAX_YEARS} лет от сегодняшней')
+    return day
+
+
+def parse_menu_day(value):
+    """'YYYY-MM-DD' -> date в допустимом для меню диапазоне; иначе ValueError с текстом для ответа."""
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Неверный формат даты (ожидается YYYY-MM-DD)')
+    return check_menu_date(day)
+
+
+def menu_templates():
+    return MenuItem.objects.filter(meal_type__in=MENU_MEAL_TYPES, day_of_week__isnull=False)
+
+
+def template_rows(date_from, date_to, existing, templates=None):
+    """Несохранённые строки меню из шаблона недели для дат окна, кроме пар (дата, приём) из existing.
+
+    templates — уже прочитанные строки шаблона (async-путь читает их сам).
+    """
+    if templates is None:
+        templates = menu_templates()
+    by_day = {}
+    for template in templates:
+        by_day.setdefault(template.day_of_week, []).append(template)
+
+    return [
+        DatedMenuItem(
+            date=day, meal_type=template.meal_type, template=template, menu_items=template.menu_items,
+            price=template.price, available_quantity=template.available_quantity
+        )
+        for day in days_between(date_from, date_to)
+        for template in by_day.get(day.isoweekday(), [])
+        if (day, template.meal_type) not in existing
+    ]
+
+
+def materialize(date_from, date_to):
+    """Создаёт из шаблона недостающие строки меню на даты; существующие не трогает.
+
+    Возвращает число созданных строк.
+    """
+    existing = set(DatedMenuItem.objects.filter(
+        date__gte=date_from, date__lte=date_to
+    ).values_list('date', 'meal_type'))
+    rows = template_rows(date_from, date_to, existing)
+    if rows:
+        # bulk_create не отправляет сигналов — сбрасываем кэш меню сами
+        DatedMenuItem.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+        invalidate_weekly_menu()
+    return len(rows)
+
+
+def copy_forward(source_from, source_to, target_from, target_to, replace=False):
+    """Повторяет меню дат [source_from, source_to] по кругу на [target_from, target_to].
+
+    Всё в одной транзакции. Источник длиной в целые недели сохраняет дни недели.
+    Без replace уже существующие даты цели не меняются. В строках источника остаток
+    уже уменьшен продажами, поэтому количество берётся из шаблона, как в materialize.
+    """
+    period = (source_to - source_from).days + 1
+    source = {}
+    for item in DatedMenuItem.objects.filter(
+        date__gte=source_from, date__lte=source_to
+    ).select_related('template'):
+        source.setdefault(item.date, []).append(item)
+
+    rows = [
+        DatedMenuItem(
+            date=day, meal_type=item.meal_type, template_id=item.template_id, menu_items=item.menu_items,
+            price=item.price,
+            available_quantity=item.template.available_quantity if item.template else item.available_quantity
+        )
+        for day in days_between(target_from, target_to)
+        for item in source.get(source_from + timedelta(days=(day - target_from).days % period), [])
+    ]
+
+    with transaction.atomic(using=current_db()):
+        if replace:
+            DatedMenuItem.objects.filter(date__gte=target_from, date__lte=target_to).delete()
+        DatedMenuItem.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+    invalidate_weekly_menu()
+    return len(rows)
+
+
+def _materialized_key(date_from, date_to):
+    return f'weekly_menu:{get_menu_version()}:materialized:{date_from.isoformat()}:{date_to.isoformat()}'
+
+
+def dated_rows(date_from, date_to):
+    return DatedMenuItem.objects.filter(date__gte=date_from, date__lte=date_to).order_by('date', 'meal_type', 'id')
+
+
+def dated_menu(date_from, date_to, materialize_missing=False):
+    """Строки меню за окно дат (чтение по индексу date, meal_type).
+
+    Незаполненные даты подставляются из шаблона без записи в базу (у таких строк id=None).
+    С materialize_missing они создаются — только для путей повара, которому нужны id
+    для выдачи; публичное чтение в базу не пишет.
+    """
+    if materialize_missing:
+        # Недостающие даты окна ищем один раз на версию меню
+        if not cache.get(_materialized_key(date_from, date_to)):
+            materialize(date_from, date_to)
+            # materialize мог сменить версию — отметку ставим уже под новой
+            cache.set(_materialized_key(date_from, date_to), True, MENU_CACHE_TIMEOUT)
+    rows = list(dated_rows(date_from, date_to).select_related('template'))
+    return _with_templates(rows, template_rows(date_from, date_to, {(item.date, item.meal_type) for item in rows}))
+
+
+async def adated_menu(date_from, date_to):
+    """dated_menu для async-представлений (без materialize_missing): два запроса через async ORM."""
+    rows = [item async for item in dated_rows(date_from, date_to).select_related('template')]
+    templates = [template async for template in menu_templates()]
+    return _with_templates(
+        rows, template_rows(date_from, date_to, {(item.date, item.meal_type) for item in rows}, templates)
+    )
+
+
+def _with_templates(rows, missing):
+    if missing:
+        rows = sorted(rows + missing, key=lambda item: (item.date, item.meal_type, item.id or 0))
+    return rows
+
+
+def build_weekly_menu(monday, items=None):
+    if items is None:
+        items = dated_menu(monday, monday + timedelta(days=6))
+    weekly_menu = {day: {meal_type: [] for meal_type in MENU_MEAL_TYPES} for day in range(1, 8)}
+    for item in items:
+        weekly_menu[item.date.isoweekday()][item.meal_type].append(DatedMenuItemSerializer(item).data)
+    return weekly_menu
+
+
+def _weekly_key(version, monday):
+    return f'weekly_menu:{version}:{monday.isoformat()}'
+
+
+def _render_weekly(weekly_menu):
+    body = JSONRenderer().render(weekly_menu)
+    return '"%s"' % sha256(body).hexdigest()[:32], body
+
+
+def get_weekly_menu(day=None):
+    """Возвращает (etag, body) для недели с днём day, собирая её не чаще одного раза на версию."""
+    monday = week_start(day or date.today())
+    key = _weekly_key(get_menu_version(), monday)
+    cached = cache.get(key)
+    if cached is None:
+        cached = _render_weekly(build_weekly_menu(monday))
+        cache.set(key, cached, MENU_CACHE_TIMEOUT)
+    return cached
+
+
+async def aget_weekly_menu(day=None):
+    """get_weekly_menu без потока из пула: версия, кэш и строки меню читаются асинхронно."""
+    monday = week_start(day or date.today())
+    key = _weekly_key(await aget_menu_version(), monday)
+    cached = await cache.aget(key)
+    if cached is None:
+        items = await adated_menu(monday, monday + timedelta(days=6))
+        cached = _render_weekly(build_weekly_menu(monday, items))
+        await cache.aset(key, cached, MENU_CACHE_TIMEOUT)
+    return cached
+
+
+def parse_menu_date(request):
+    """?date=YYYY-MM-DD (любой день нужной недели); без параметра — текущая неделя."""
+    value = request.GET.get('date')
+    return parse_menu_day(value) if value else None
+
+
+def weekly_menu_response(request):
+    """Ответ с ETag: 304, если у клиента актуальная версия меню."""
+    try:
+        day = parse_menu_date(request)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return menu_etag_response(request, *get_weekly_menu(day))
+
+
+def menu_etag_response(request, etag, body):
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if etag in client_etags or '*' in client_etags:
+        return HttpResponse(status=304, headers=headers)
+
+    return HttpResponse(body, content_type='application/json', headers=headers)
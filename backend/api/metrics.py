@@ -0,0 +1,279 @@
+# api/metrics
+# Метрики запросов: число SQL-запросов, время в БД, время сериализации, размер ответа.
+# Хранятся в памяти процесса: скользящее окно для /api/admin/metrics/ и накопленные
+# с запуска значения для формата Prometheus.
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from .tenancy import current_db
+
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограмм (последняя корзина — всё, что больше)
+BUCKETS = {
+    'duration_ms': (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+    'db_ms': (1, 5, 10, 25, 50, 100, 250, 500, 1000),
+    'serialize_ms': (1, 5, 10, 25, 50, 100, 250),
+    'queries': (0, 1, 2, 5, 10, 20, 50, 100),
+    'response_bytes': (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+}
+SLOW_LOG_MAX_QUERIES = 50
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, bounds):
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def merge(self, other):
+        for i, value in enumerate(other.counts):
+            self.counts[i] += value
+        self.total += other.total
+        self.count += other.count
+
+
+def _new_histograms():
+    return {name: Histogram(bounds) for name, bounds in BUCKETS.items()}
+
+
+class MetricsRegistry:
+    """Гистограммы по представлениям: текущий слот скользящего окна и накопленные итоги."""
+
+    def __init__(self, window_seconds, slots=10):
+        self.slot_seconds = max(1, window_seconds // slots)
+        self.slots = slots
+        self._window = {}  # номер слота -> {представление: {метрика: Histogram}}
+        self._totals = defaultdict(_new_histograms)
+        self._lock = threading.Lock()
+
+    def record(self, view, values):
+        slot = int(time.time() // self.slot_seconds)
+        with self._lock:
+            current = self._window.get(slot)
+            if current is None:
+                current = self._window[slot] = defaultdict(_new_histograms)
+                for old in [s for s in self._window if s <= slot - self.slots]:
+                    del self._window[old]
+            for target in (current[view], self._totals[view]):
+                for name, value in values.items():
+                    histogram = target[name]
+                    histogram.counts[bisect_left(BUCKETS[name], value)] += 1
+                    histogram.total += value
+                    histogram.count += 1
+
+    def window(self):
+        """Сумма слотов за последние window_seconds: {представление: {метрика: Histogram}}."""
+        oldest = int(time.time() // self.slot_seconds) - self.slots + 1
+        merged = defaultdict(_new_histograms)
+        with self._lock:
+            for slot, views in self._window.items():
+                if slot < oldest:
+                    continue
+                for view, histograms in views.items():
+                    for name, histogram in histograms.items():
+                        merged[view][name].merge(histogram)
+        return merged
+
+    def totals(self):
+        with self._lock:
+            merged = defaultdict(_new_histograms)
+            for view, histograms in self._totals.items():
+                for name, histogram in histograms.items():
+                    merged[view][name].merge(histogram)
+        return merged
+
+
+registry = MetricsRegistry(settings.METRICS_WINDOW_SECONDS)
+
+
+def percentile(histogram, bounds, q):
+    """Оценка перцентиля по гистограмме: верхняя граница корзины, где набирается q%."""
+    if not histogram.count:
+        return None
+    rank = q / 100 * histogram.count
+    seen = 0
+    for i, count in enumerate(histogram.counts):
+        seen += count
+        if seen >= rank:
+            return bounds[i] if i < len(bounds) else None
+    return None
+
+
+def window_summary():
+    summary = {}
+    for view, histograms in sorted(registry.window().items()):
+        summary[view] = {'count': histograms['duration_ms'].count}
+        for name, histogram in histograms.items():
+            bounds = BUCKETS[name]
+            summary[view][name] = {
+                'avg': round(histogram.total / histogram.count, 2) if histogram.count else None,
+                'p50': percentile(histogram, bounds, 50),
+                'p95': percentile(histogram, bounds, 95),
+                'p99': percentile(histogram, bounds, 99),
+                'buckets': dict(zip([*map(str, bounds), '+Inf'], histogram.counts)),
+            }
+    return {
+        'window_seconds': registry.slot_seconds * registry.slots,
+        'sample_rate': settings.METRICS_SAMPLE_RATE,
+        'views': summary,
+    }
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def prometheus_text():
+    lines = []
+    totals = registry.totals()
+    for name, bounds in BUCKETS.items():
+        metric = f'canteen_request_{name}'
+        lines.append(f'# TYPE {metric} histogram')
+        for view, histograms in sorted(totals.items()):
+            histogram = histograms[name]
+            labels = f'view="{_label(view)}"'
+            cumulative = 0
+            for bound, count in zip([*map(str, bounds), '+Inf'], histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{labels}}} {histogram.total:g}')
+            lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+    lines.append('# TYPE canteen_metrics_sample_rate gauge')
+    lines.append(f'canteen_metrics_sample_rate {settings.METRICS_SAMPLE_RATE:g}')
+    return '\n'.join(lines) + '\n'
+
+
+class QueryCollector:
+    """execute_wrapper: считает запросы и время в БД; SQL хранит для журнала медленных запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < SLOW_LOG_MAX_QUERIES:
+                self.queries.append((elapsed, sql))
+
+
+class InstrumentationMiddleware:
+    """Замеряет запросы к API и раскладывает их по представлениям (METHOD route).
+
+    Полный замер делается для доли METRICS_SAMPLE_RATE запросов; остальные проходят
+    без накладных расходов. Для async-представлений запросы к БД идут в других
+    потоках, поэтому для них пишутся только длительность и размер ответа.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _sampled(self, request):
+        rate = settings.METRICS_SAMPLE_RATE
+        return request.path.startswith('/api/') and (rate >= 1 or random.random() < rate)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        if not self._sampled(request):
+            # Вне выборки только сверяем длительность с порогом медленных запросов
+            response = self.get_response(request)
+            self._check_slow(request, response, started)
+            return response
+
+        request._metrics_sampled = True
+        collector = QueryCollector()
+        with connections[current_db()].execute_wrapper(collector):
+            response = self.get_response(request)
+        self._finish(request, response, started, collector)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        if not self._sampled(request):
+            response = await self.get_response(request)
+            self._check_slow(request, response, started)
+            return response
+
+        request._metrics_sampled = True
+        response = await self.get_response(request)
+        self._finish(request, response, started, None)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response рендерится после этого хука — замеряем рендер колбэком после него
+        if hasattr(request, '_metrics_sampled'):
+            started = time.perf_counter()
+
+            def rendered(response):
+                request._metrics_serialize = time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, response, started, collector):
+        match = request.resolver_match
+        if match is None:
+            return
+        duration = time.perf_counter() - started
+        view = f'{request.method} /{match.route}'
+        values = {
+            'duration_ms': 1000 * duration,
+            'serialize_ms': 1000 * getattr(request, '_metrics_serialize', 0.0),
+            'response_bytes': 0 if response.streaming else len(response.content),
+        }
+        if collector is not None:
+            values['queries'] = collector.count
+            values['db_ms'] = 1000 * collector.seconds
+        registry.record(view, values)
+
+        if values['duration_ms'] >= settings.METRICS_SLOW_REQUEST_MS:
+            log_slow_request(request, response, values['duration_ms'], collector)
+
+    def _check_slow(self, request, response, started):
+        duration_ms = 1000 * (time.perf_counter() - started)
+        if duration_ms >= settings.METRICS_SLOW_REQUEST_MS:
+            log_slow_request(request, response, duration_ms, None)
+
+
+def log_slow_request(request, response, duration_ms, collector):
+    lines = [f'Медленный запрос {request.method} {request.get_full_path()} -> {response.status_code}: {duration_ms:.0f} мс']
+    if collector is not None:
+        lines[0] += f", SQL: {collector.count} за {1000 * collector.seconds:.0f} мс"
+        lines.extend(f'  {1000 * elapsed:7.1f} мс  {sql}' for elapsed, sql in collector.queries)
+        if collector.count > len(collector.queries):
+            lines.append(f'  ... ещё {collector.count - len(collector.queries)}')
+    else:
+        lines[0] += ' (SQL не записан: запрос не попал в выборку или представление асинхронное)'
+    logger.warning('\n'.join(lines))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_rosterday_mealeligibility'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mealissued',
+            index=models.Index(fields=['date', 'meal_type', 'user'], name='mealissued_date_meal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealpayment',
+            index=models.Index(fields=['date', 'meal_type'], name='mealpayment_date_meal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-created_at'], name='review_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['end_date', 'start_date'], name='subscription_active_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMealStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('meal_type', models.CharField(choices=[('breakfast', 'Завтрак'), ('lunch', 'Обед'), ('combined', 'Комплекс')], max_length=20)),
+                ('issued', models.IntegerField(default=0, verbose_name='Выдано')),
+                ('one_time_payments', models.IntegerField(default=0, verbose_name='Разовых оплат')),
+                ('active_subscriptions', models.IntegerField(default=0, verbose_name='Действующих абонементов')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Выручка')),
+            ],
+            options={
+                'verbose_name': 'Дневная сводка',
+                'verbose_name_plural': 'Дневные сводки',
+                'unique_together': {('date', 'meal_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+# Диапазонный GiST-индекс нужен только PostgreSQL; на SQLite миграция ничего не делает
+CREATE_INDEX = (
+    "CREATE INDEX IF NOT EXISTS subscription_period_gist ON api_subscription "
+    "USING gist (daterange(start_date, end_date, '[]'))"
+)
+DROP_INDEX = "DROP INDEX IF EXISTS subscription_period_gist"
+
+
+def create_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_period_index, drop_period_index),
+    ]
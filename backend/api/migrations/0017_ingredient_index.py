@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_subscription_period_gist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Ингредиент')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент',
+                'verbose_name_plural': 'Ингредиенты',
+            },
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='ingredients',
+            field=models.ManyToManyField(blank=True, related_name='dishes', to='api.ingredient'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='allergens',
+            field=models.ManyToManyField(blank=True, related_name='allergic_users', to='api.ingredient'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+import re
+
+from django.db import migrations
+
+
+# Копия api.allergens.parse_ingredients: миграция не должна зависеть от текущего кода
+SEPARATORS = re.compile(r'[,;/\n]+|\s+и\s+')
+
+
+def parse_ingredients(text):
+    names = set()
+    for part in SEPARATORS.split(text or ''):
+        name = ' '.join(part.lower().replace('ё', 'е').split()).strip(' .')[:100]
+        if name:
+            names.add(name)
+    return names
+
+
+def index_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('api', 'Ingredient')
+    MenuItem = apps.get_model('api', 'MenuItem')
+    User = apps.get_model('api', 'User')
+    # Явная база: у каждой школы своя, роутер здесь не действует
+    db = schema_editor.connection.alias
+
+    dishes = {pk: parse_ingredients(text) for pk, text in MenuItem.objects.using(db).values_list('id', 'menu_items')}
+    users = {
+        pk: parse_ingredients(text)
+        for pk, text in User.objects.using(db).exclude(allergies='').values_list('id', 'allergies')
+    }
+
+    names = set().union(*dishes.values(), *users.values())
+    Ingredient.objects.using(db).bulk_create([Ingredient(name=name) for name in names], ignore_conflicts=True)
+    ids = dict(Ingredient.objects.using(db).values_list('name', 'id'))
+
+    DishLink = MenuItem.ingredients.through
+    DishLink.objects.using(db).bulk_create(
+        [DishLink(menuitem_id=pk, ingredient_id=ids[name]) for pk, found in dishes.items() for name in found],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+    UserLink = User.allergens.through
+    UserLink.objects.using(db).bulk_create(
+        [UserLink(user_id=pk, ingredient_id=ids[name]) for pk, found in users.items() for name in found],
+        ignore_conflicts=True,
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_ingredient_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_index_ingredients'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatedMenuItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Дата')),
+                ('meal_type', models.CharField(choices=[('breakfast', 'Завтрак'), ('lunch', 'Обед')], max_length=20, verbose_name='Тип приёма пищи')),
+                ('menu_items', models.TextField(verbose_name='Состав меню')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за приём пищи')),
+                ('available_quantity', models.PositiveIntegerField(default=0, verbose_name='Остаток порций')),
+                ('template', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dated', to='api.menuitem', verbose_name='Шаблон')),
+            ],
+            options={
+                'verbose_name': 'Меню на дату',
+                'verbose_name_plural': 'Календарь меню',
+                'unique_together': {('date', 'meal_type')},
+            },
+        ),
+    ]
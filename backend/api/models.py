@@ -1,12 +1,60 @@
 #api/models
-from django.db import models
+from django.db import models, connections
 from django.contrib.auth.models import AbstractUser
+from django.dispatch import Signal
 from datetime import timedelta
 from django.contrib.auth import get_user_model
 
+
+# Отправляется после атомарного изменения остатка (update() не вызывает post_save)
+stock_changed = Signal()
+
+class Ingredient(models.Model):
+    # Нормализованное название (нижний регистр, ё -> е), разобранное из текстовых полей
+    name = models.CharField(max_length=100, unique=True, verbose_name="Ингредиент")
+
+    class Meta:
+        verbose_name = "Ингредиент"
+        verbose_name_plural = "Ингредиенты"
+
+    def __str__(self):
+        return self.name
+
+
 class User(AbstractUser):
     role = models.CharField(max_length=50, default='ученик')
     allergies = models.TextField(blank=True, verbose_name="Пищевые аллергии")
+    allergens = models.ManyToManyField(Ingredient, blank=True, related_name='allergic_users')
+
+
+class MenuItemQuerySet(models.QuerySet):
+    def take_portions(self, pk, quantity):
+        """Атомарно списывает порции одним UPDATE ... RETURNING.
+
+        Возвращает новый остаток или None, если порций недостаточно.
+        """
+        connection = connections[self.db]
+        # id вне диапазона столбца драйвер не примет вовсе; такой строки заведомо нет
+        low, high = connection.ops.integer_field_range(self.model._meta.pk.get_internal_type())
+        if not low <= pk <= high:
+            raise self.model.DoesNotExist
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        column = connection.ops.quote_name('available_quantity')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET {column} = {column} - %s '
+                f'WHERE id = %s AND {column} >= %s RETURNING {column}',
+                [quantity, pk, quantity],
+            )
+            row = cursor.fetchone()
+
+        if row is None:
+            if not self.filter(pk=pk).exists():
+                raise self.model.DoesNotExist
+            return None
+
+        stock_changed.send(sender=self.model, pk=pk, available_quantity=row[0])
+        return row[0]
 
 
 class MenuItem(models.Model):
@@ -35,7 +83,9 @@ class MenuItem(models.Model):
     menu_items = models.TextField(verbose_name="Состав меню")  # Например: "Омлет, каша, чай"
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена за приём пищи")
     available_quantity = models.PositiveIntegerField(default=0, verbose_name="Остаток порций")
+    ingredients = models.ManyToManyField(Ingredient, blank=True, related_name='dishes')
 
+    objects = MenuItemQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Приём пищи"
@@ -43,6 +93,25 @@ class MenuItem(models.Model):
         unique_together = ['day_of_week', 'meal_type']
 
 
+class DatedMenuItem(models.Model):
+    """Меню на конкретную дату: копия шаблона MenuItem со своим остатком порций."""
+    date = models.DateField(verbose_name="Дата")
+    meal_type = models.CharField(max_length=20, choices=MenuItem.MEAL_TYPES, verbose_name="Тип приёма пищи")
+    template = models.ForeignKey(
+        MenuItem, null=True, blank=True, on_delete=models.SET_NULL, related_name='dated', verbose_name="Шаблон"
+    )
+    menu_items = models.TextField(verbose_name="Состав меню")
+    price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена за приём пищи")
+    available_quantity = models.PositiveIntegerField(default=0, verbose_name="Остаток порций")
+
+    objects = MenuItemQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Меню на дату"
+        verbose_name_plural = "Календарь меню"
+        # Уникальный индекс (date, meal_type) обслуживает и чтение окна дат
+        unique_together = ['date', 'meal_type']
+
 
 class PurchaseRequest(models.Model):
     product_name = models.CharField(max_length=255, verbose_name="Название продукта")
@@ -59,6 +128,10 @@ class PurchaseRequest(models.Model):
     class Meta:
         verbose_name = "Заявка на закупку"
         verbose_name_plural = "Заявки на закупку"
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='purchase_keyset_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='purchase_status_keyset_idx'),
+        ]
 
 
 
@@ -68,9 +141,51 @@ class MealPayment(models.Model):
     date = models.DateField()  # дата, на которую оплачено
     meal_type = models.CharField(max_length=20, choices=[('breakfast', 'Завтрак'), ('lunch', 'Обед'), ('combined', 'Комплекс')])
     paid_at = models.DateTimeField(auto_now_add=True)
+    # Цена по меню на момент оплаты; у оплат, сделанных до корзины, не записана
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Сумма")
 
     class Meta:
         unique_together = ['user', 'date', 'meal_type']
+        indexes = [
+            models.Index(fields=['date', 'meal_type'], name='mealpayment_date_meal_idx'),
+        ]
+
+
+class PaymentIdempotencyKey(models.Model):
+    # Повтор запроса оплаты с тем же ключом возвращает сохранённый ответ, а не платит второй раз
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    request_hash = models.CharField(max_length=64)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности оплаты"
+        verbose_name_plural = "Ключи идемпотентности оплат"
+        unique_together = ['user', 'key']
+
+
+class SubscriptionQuerySet(models.QuerySet):
+    def _period(self):
+        # Совпадает с выражением GiST-индекса subscription_period_gist
+        from django.contrib.postgres.fields import DateRangeField
+        return models.Func(
+            models.F('start_date'), models.F('end_date'), models.Value('[]'),
+            function='daterange', output_field=DateRangeField()
+        )
+
+    def active_on(self, day):
+        """Абонементы, действующие на дату day."""
+        if connections[self.db].vendor == 'postgresql':
+            return self.alias(period=self._period()).filter(period__contains=day)
+        return self.filter(start_date__lte=day, end_date__gte=day)
+
+    def overlapping(self, date_from, date_to):
+        """Абонементы, действующие хотя бы один день из [date_from, date_to]."""
+        if connections[self.db].vendor == 'postgresql':
+            from django.db.backends.postgresql.psycopg_any import DateRange
+            return self.alias(period=self._period()).filter(period__overlap=DateRange(date_from, date_to, '[]'))
+        return self.filter(start_date__lte=date_to, end_date__gte=date_from)
 
 
 class Subscription(models.Model):
@@ -79,9 +194,15 @@ class Subscription(models.Model):
     end_date = models.DateField()  # = start_date + 30 дней
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Абонемент"
         verbose_name_plural = "Абонементы"
+        indexes = [
+            # Поиск «активен на дату D»: end_date >= D AND start_date <= D
+            models.Index(fields=['end_date', 'start_date'], name='subscription_active_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.end_date:
@@ -97,6 +218,57 @@ class MealIssued(models.Model):
 
     class Meta:
         unique_together = ['user', 'date', 'meal_type']
+        indexes = [
+            models.Index(fields=['date', 'meal_type', 'user'], name='mealissued_date_meal_idx'),
+        ]
+
+
+class RosterDay(models.Model):
+    date = models.DateField()
+    meal_type = models.CharField(max_length=20, choices=[('breakfast', 'Завтрак'), ('lunch', 'Обед'), ('combined', 'Комплекс')])
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Список питающихся (день)"
+        verbose_name_plural = "Списки питающихся (дни)"
+        unique_together = ['date', 'meal_type']
+
+
+class MealEligibility(models.Model):
+    # Материализованный список: кто может получить питание в этот день (разовая оплата или абонемент)
+    date = models.DateField()
+    meal_type = models.CharField(max_length=20, choices=[('breakfast', 'Завтрак'), ('lunch', 'Обед'), ('combined', 'Комплекс')])
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        verbose_name = "Право на питание"
+        verbose_name_plural = "Права на питание"
+        unique_together = ['date', 'meal_type', 'user']
+
+
+class DailyMealStats(models.Model):
+    # Сводка за день, обновляется инкрементально при записи выдач, оплат и абонементов
+    date = models.DateField()
+    meal_type = models.CharField(max_length=20, choices=[('breakfast', 'Завтрак'), ('lunch', 'Обед'), ('combined', 'Комплекс')])
+    issued = models.IntegerField(default=0, verbose_name="Выдано")
+    one_time_payments = models.IntegerField(default=0, verbose_name="Разовых оплат")
+    active_subscriptions = models.IntegerField(default=0, verbose_name="Действующих абонементов")
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Выручка")
+
+    class Meta:
+        verbose_name = "Дневная сводка"
+        verbose_name_plural = "Дневные сводки"
+        unique_together = ['date', 'meal_type']
+
+
+class DataVersion(models.Model):
+    # Версия набора данных, общая для всех процессов: кэш в памяти процесса сверяется с ней
+    name = models.CharField(max_length=100, unique=True)
+    version = models.CharField(max_length=32)
+
+    class Meta:
+        verbose_name = "Версия данных"
+        verbose_name_plural = "Версии данных"
 
 
 User = get_user_model()
@@ -109,5 +281,10 @@ class Review(models.Model):
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='review_user_keyset_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} — {self.meal_type} ({self.rating}⭐)"
\ No newline at end of file
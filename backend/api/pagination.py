@@ -0,0 +1,54 @@
+# api/pagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, pk):
+    return urlsafe_b64encode(f'{created_at.isoformat()}|{pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(pk)
+
+
+def page_size(request):
+    try:
+        limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_filter(queryset, cursor):
+    """Выборка строк после курсора, от новых к старым. Неверный курсор — ValueError."""
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        # Условие с OR планировщик не превращает в границу индекса и просматривает его с начала;
+        # избыточное created_at <= курсора даёт поиск по диапазону
+        queryset = queryset.filter(created_at__lte=created_at).filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return queryset
+
+
+def keyset_page(queryset, cursor, limit):
+    """Страница по ключу (created_at, id) от новых к старым.
+
+    queryset должен быть values() с полями created_at и id. Поиск следующей
+    страницы идёт по индексу, поэтому время не зависит от номера страницы.
+    Неверный курсор — ValueError.
+    """
+    rows = list(keyset_filter(queryset, cursor)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    return rows, next_cursor
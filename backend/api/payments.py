@@ -0,0 +1,127 @@
+# api/payments
+from datetime import datetime
+from decimal import Decimal
+from hashlib import sha256
+
+from django.db import IntegrityError, transaction
+
+from .models import MealPayment, PaymentIdempotencyKey
+from .roster import add_payments
+from .reports import invalidate_days
+from .rollups import meal_prices, record_payments
+from .events import publish
+from .tenancy import current_db
+
+
+MAX_CART_SIZE = 100
+MAX_KEY_LENGTH = PaymentIdempotencyKey._meta.get_field('key').max_length
+MEAL_TYPES = {value for value, _ in MealPayment._meta.get_field('meal_type').choices}
+
+
+def _parse_item(item):
+    if not isinstance(item, dict):
+        return None
+    try:
+        date_obj = datetime.strptime(item.get('date'), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+    meal_type = item.get('meal_type')
+    if meal_type not in MEAL_TYPES:
+        return None
+    return date_obj, meal_type
+
+
+def user_payments(user, dates):
+    return MealPayment.objects.filter(user=user, date__in=dates)
+
+
+def _cart_hash(keys):
+    return sha256(';'.join(f'{date_obj.isoformat()}:{meal_type}' for date_obj, meal_type in keys).encode()).hexdigest()
+
+
+def pay_cart(user, items, idempotency_key=None):
+    """Оплачивает корзину пар (дата, тип приёма пищи) одной транзакцией.
+
+    Цена каждой позиции берётся из меню на дату и записывается в оплату.
+    Возвращает (ответ, replayed): повтор с тем же ключом получает сохранённый
+    ответ первого запроса и ничего не оплачивает. Ошибки корзины — ValueError,
+    в этом случае не оплачивается ни одна позиция.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValueError('Корзина пуста')
+    if len(items) > MAX_CART_SIZE:
+        raise ValueError(f'В корзине больше {MAX_CART_SIZE} позиций')
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+        raise ValueError(f'Ключ идемпотентности должен быть от 1 до {MAX_KEY_LENGTH} символов')
+
+    keys = []
+    for number, item in enumerate(items, 1):
+        key = _parse_item(item)
+        if key is None:
+            raise ValueError(f'Позиция {number}: нужны date (YYYY-MM-DD) и meal_type (breakfast, lunch, combined)')
+        keys.append(key)
+
+    prices = meal_prices(min(keys)[0], max(keys)[0])
+    for date_obj, meal_type in keys:
+        if not prices[date_obj, meal_type]:
+            raise ValueError(f'Нет меню на {date_obj.isoformat()} ({meal_type})')
+
+    with transaction.atomic(using=current_db()):
+        if idempotency_key is not None:
+            # Ключ вставляем первым: параллельный повтор ждёт на уникальном индексе
+            # и после нашей фиксации получает уже сохранённый ответ
+            request_hash = _cart_hash(sorted(set(keys)))
+            try:
+                with transaction.atomic(using=current_db()):
+                    record = PaymentIdempotencyKey.objects.create(
+                        user=user, key=idempotency_key, request_hash=request_hash
+                    )
+            except IntegrityError:
+                stored = PaymentIdempotencyKey.objects.get(user=user, key=idempotency_key)
+                if stored.request_hash != request_hash:
+                    raise ValueError('Ключ идемпотентности уже использован для другой корзины')
+                return stored.response, True
+
+        paid = set(user_payments(user, {date_obj for date_obj, _ in keys}).values_list('date', 'meal_type'))
+        to_create = {
+            key: MealPayment(user=user, date=key[0], meal_type=key[1], amount=prices[key])
+            for key in keys if key not in paid
+        }
+        MealPayment.objects.bulk_create(to_create.values(), ignore_conflicts=True)
+        # Строки, которые успел вставить параллельный запрос, сохранили своё paid_at
+        stored = {
+            (date_obj, meal_type): paid_at
+            for date_obj, meal_type, paid_at in user_payments(
+                user, {date_obj for date_obj, _ in to_create}
+            ).values_list('date', 'meal_type', 'paid_at')
+        }
+        created = {key: obj for key, obj in to_create.items() if stored.get(key) == obj.paid_at}
+
+        results = []
+        seen = set()
+        for key in keys:
+            item_status = 'paid' if key in created and key not in seen else 'already_paid'
+            seen.add(key)
+            results.append({
+                'date': key[0].isoformat(),
+                'meal_type': key[1],
+                'status': item_status,
+                'amount': str(prices[key]) if item_status == 'paid' else '0.00',
+            })
+        response = {'items': results, 'total': str(sum((obj.amount for obj in created.values()), Decimal('0.00')))}
+
+        # bulk_create не отправляет post_save. Сводки и список питающихся пишем в той же
+        # транзакции: одна фиксация на корзину вместо одной на каждый день
+        if created:
+            record_payments(list(created.values()))
+            add_payments(created.values())
+        if idempotency_key is not None:
+            record.response = response
+            record.save(update_fields=['response'])
+
+    if created:
+        for date_obj in {date_obj for date_obj, _ in created}:
+            invalidate_days(date_obj)
+        for date_obj, meal_type in created:
+            publish('payment', user_id=user.pk, date=date_obj, meal_type=meal_type)
+    return response, False
@@ -0,0 +1,26 @@
+# api/permissions
+from rest_framework.permissions import BasePermission
+
+
+ADMIN_ROLES = ('admin', 'администратор')
+COOK_ROLES = ('cook', 'повар', 'поваренок')
+
+
+class IsAdminRole(BasePermission):
+    """Доступ только администраторам столовой (по полю role) и суперпользователям."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (
+            getattr(user, 'role', None) in ADMIN_ROLES or user.is_superuser
+        ))
+
+
+class IsCookRole(BasePermission):
+    """Доступ поварам; администраторы и суперпользователи тоже могут работать на раздаче."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (
+            getattr(user, 'role', None) in COOK_ROLES + ADMIN_ROLES or user.is_superuser
+        ))
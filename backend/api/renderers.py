@@ -0,0 +1,46 @@
+# api/renderers
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Список словарей -> столбцы массивов; повторяющиеся строки кодируются словарём.
+
+    [{"id": 1, "role": "ученик"}, {"id": 2, "role": "ученик"}] превращается в
+    {"count": 2, "columns": {"id": [1, 2], "role": [0, 0]}, "dictionaries": {"role": ["ученик"]}}.
+    Выбирается заголовком Accept: application/vnd.canteen.columnar+json или ?format=columnar.
+    """
+
+    media_type = 'application/vnd.canteen.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list) and all(isinstance(row, dict) for row in data):
+            data = to_columns(data)
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def to_columns(rows):
+    names = list(rows[0]) if rows else []
+    columns = {name: [row[name] for row in rows] for name in names}
+    dictionaries = {}
+
+    for name, values in columns.items():
+        distinct = set(values)
+        if all(isinstance(value, str) for value in distinct) and len(distinct) * 2 <= len(values):
+            dictionary = sorted(distinct)
+            index = {value: i for i, value in enumerate(dictionary)}
+            columns[name] = [index[value] for value in values]
+            dictionaries[name] = dictionary
+
+    return {'count': len(rows), 'columns': columns, 'dictionaries': dictionaries}
+
+
+class PrometheusTextRenderer(BaseRenderer):
+    """Текстовый формат Prometheus; представление само готовит строку (api.metrics.prometheus_text)."""
+
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset) if isinstance(data, str) else b''
@@ -0,0 +1,144 @@
+# api/reports
+import asyncio
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import MealPayment, MealIssued
+from .subscriptions import active_count, get_index
+from .tenancy import current_db
+from .versions import aget_version, bump_versions, get_versions
+
+
+EMPTY_COUNTERS = {
+    'breakfast_count': 0,
+    'lunch_count': 0,
+    'meals_issued': 0,
+    'unique_students': 0,
+    'one_time_payments': 0,
+    'active_subscriptions': 0,
+}
+
+
+# Закрытый день меняется только записью задним числом (офлайн-синхронизация, поздняя оплата).
+# Его версия хранится в базе и входит в ключ, поэтому сброс виден всем процессам, а значение
+# по старому ключу просто перестаёт читаться: срок жизни не нужен
+REPORT_CACHE_TIMEOUT = None
+
+
+def _version_name(day):
+    return f'report:day:{day.isoformat()}'
+
+
+def _day_key(day, version):
+    return f'report:day:{day.isoformat()}:{version}'
+
+
+def days_between(date_from, date_to):
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days + 1)]
+
+
+def issued_counts(date_from, date_to):
+    return MealIssued.objects.filter(date__gte=date_from, date__lte=date_to).values('date').annotate(
+        breakfast_count=Count('id', filter=Q(meal_type='breakfast')),
+        lunch_count=Count('id', filter=Q(meal_type='lunch')),
+        meals_issued=Count('id'),
+        unique_students=Count('user', distinct=True),
+    )
+
+
+def payment_counts(date_from, date_to):
+    return MealPayment.objects.filter(date__gte=date_from, date__lte=date_to).values('date').annotate(
+        one_time_payments=Count('id'),
+    )
+
+
+def compute_counters(date_from, date_to):
+    """Считает счётчики за каждый день диапазона: по одному проходу на таблицу."""
+    days = days_between(date_from, date_to)
+    counters = {day: dict(EMPTY_COUNTERS) for day in days}
+
+    for row in issued_counts(date_from, date_to):
+        counters[row.pop('date')].update(row)
+
+    for row in payment_counts(date_from, date_to):
+        counters[row['date']]['one_time_payments'] = row['one_time_payments']
+
+    # Версию индекса сверяем один раз на диапазон, а не на каждый день
+    subscriptions = get_index()
+    for day in days:
+        counters[day]['active_subscriptions'] = subscriptions.active_count(day)
+
+    return counters
+
+
+def day_counters(date_from, date_to=None):
+    """Счётчики за дату или диапазон дат. Прошедшие дни берутся из кэша."""
+    date_to = date_to or date_from
+    days = days_between(date_from, date_to)
+    today = date.today()
+
+    past = [day for day in days if day < today]
+    # Версии читаем до подсчёта: запись во время подсчёта сдвинет версию, и день пересчитается
+    versions = get_versions([_version_name(day) for day in past]) if past else {}
+    keys = {day: _day_key(day, versions[_version_name(day)]) for day in past}
+    cached = cache.get_many(keys.values())
+    counters = {day: cached[key] for day, key in keys.items() if key in cached}
+
+    missing = [day for day in days if day not in counters]
+    if missing:
+        computed = compute_counters(missing[0], missing[-1])
+        counters.update({day: computed[day] for day in missing})
+        cache.set_many({keys[day]: computed[day] for day in missing if day < today}, REPORT_CACHE_TIMEOUT)
+
+    return counters
+
+
+async def aday_counters(day):
+    """Асинхронный вариант day_counters для одной даты: три запроса идут через asyncio.gather."""
+    key = None
+    if day < date.today():
+        key = _day_key(day, await aget_version(_version_name(day)))
+        cached = await cache.aget(key)
+        if cached is not None:
+            return cached
+
+    issued, payments, active = await asyncio.gather(
+        MealIssued.objects.filter(date=day).aaggregate(
+            breakfast_count=Count('id', filter=Q(meal_type='breakfast')),
+            lunch_count=Count('id', filter=Q(meal_type='lunch')),
+            meals_issued=Count('id'),
+            unique_students=Count('user', distinct=True),
+        ),
+        MealPayment.objects.filter(date=day).acount(),
+        sync_to_async(active_count)(day),
+    )
+    counters = dict(issued, one_time_payments=payments, active_subscriptions=active)
+
+    if key is not None:
+        await cache.aset(key, counters, REPORT_CACHE_TIMEOUT)
+    return counters
+
+
+def invalidate_days(date_from, date_to=None):
+    """Сдвигает версии закрытых дней, в которых появились записи.
+
+    Сегодня и будущие дни не кэшируются, и их версии не трогаем: иначе каждая выдача
+    на раздаче писала бы одну и ту же строку версии. Если транзакция с записью за сегодня
+    зафиксировалась уже после полуночи, день успел закрыться — сдвигаем его после фиксации.
+    """
+    date_to = date_to or date_from
+    today = date.today()
+    days = days_between(date_from, min(date_to, today - timedelta(days=1)))
+    if days:
+        bump_versions([_version_name(day) for day in days])
+    if date_from <= today <= date_to:
+        transaction.on_commit(lambda: _invalidate_closed(today), using=current_db())
+
+
+def _invalidate_closed(day):
+    if day < date.today():
+        bump_versions([_version_name(day)])
@@ -0,0 +1,149 @@
+# api/rollups
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import DatedMenuItem, MenuItem, MealPayment, MealIssued, DailyMealStats
+from .reports import compute_counters, days_between
+from .tenancy import current_db
+
+
+ROLLUP_MEAL_TYPES = ('breakfast', 'lunch', 'combined')
+
+
+def meal_prices(date_from, date_to):
+    """Цены по (дата, тип приёма пищи) из меню на даты; комплекс = завтрак + обед.
+
+    Даты, для которых строк меню ещё нет, берут цену из шаблона недели.
+    Комплекс продаётся только целиком: без цены завтрака или обеда его цена — 0.
+    """
+    templates = {
+        (day_of_week, meal_type): price
+        for day_of_week, meal_type, price in MenuItem.objects.filter(
+            meal_type__in=('breakfast', 'lunch')
+        ).values_list('day_of_week', 'meal_type', 'price')
+    }
+    dated = {
+        (day, meal_type): price
+        for day, meal_type, price in DatedMenuItem.objects.filter(
+            date__gte=date_from, date__lte=date_to, meal_type__in=('breakfast', 'lunch')
+        ).values_list('date', 'meal_type', 'price')
+    }
+    prices = defaultdict(Decimal)
+    for day in days_between(date_from, date_to):
+        for meal_type in ('breakfast', 'lunch'):
+            prices[day, meal_type] = dated.get((day, meal_type), templates.get((day.isoweekday(), meal_type), Decimal('0')))
+        if prices[day, 'breakfast'] and prices[day, 'lunch']:
+            prices[day, 'combined'] = prices[day, 'breakfast'] + prices[day, 'lunch']
+    return prices
+
+
+def _ensure_rows(days, meal_types=ROLLUP_MEAL_TYPES):
+    DailyMealStats.objects.bulk_create(
+        [DailyMealStats(date=day, meal_type=meal_type) for day in days for meal_type in meal_types],
+        ignore_conflicts=True
+    )
+
+
+def record_issued(date_obj, meal_type, delta=1):
+    _ensure_rows([date_obj], [meal_type])
+    DailyMealStats.objects.filter(date=date_obj, meal_type=meal_type).update(issued=F('issued') + delta)
+
+
+def record_payments(payments, delta=1):
+    """Учитывает пачку оплат в дневных сводках.
+
+    Выручка — записанная в оплате сумма, для старых оплат без суммы — цена меню.
+    """
+    unpriced = [payment.date for payment in payments if payment.amount is None]
+    prices = meal_prices(min(unpriced), max(unpriced)) if unpriced else {}
+    totals = defaultdict(lambda: [0, Decimal('0')])
+    for payment in payments:
+        total = totals[payment.date, payment.meal_type]
+        total[0] += 1
+        total[1] += payment.amount if payment.amount is not None else prices[payment.date, payment.meal_type]
+
+    _ensure_rows({day for day, _ in totals})
+    # executemany вместо UPDATE через ORM на каждый день: корзина на месяц — это десятки строк сводки
+    connection = connections[DailyMealStats.objects.db]
+    table = connection.ops.quote_name(DailyMealStats._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {table} SET one_time_payments = one_time_payments + %s, revenue = revenue + %s '
+            f'WHERE date = %s AND meal_type = %s',
+            [
+                (count * delta, connection.ops.adapt_decimalfield_value(revenue * delta),
+                 connection.ops.adapt_datefield_value(day), meal_type)
+                for (day, meal_type), (count, revenue) in totals.items()
+            ]
+        )
+
+
+def record_payment(payment, delta=1):
+    record_payments([payment], delta)
+
+
+def record_subscription(subscription, delta=1):
+    _ensure_rows(days_between(subscription.start_date, subscription.end_date))
+    DailyMealStats.objects.filter(
+        date__gte=subscription.start_date,
+        date__lte=subscription.end_date
+    ).update(active_subscriptions=F('active_subscriptions') + delta)
+
+
+def backfill(date_from, date_to):
+    """Пересчитывает сводки за диапазон по исходным таблицам (выручка — по суммам оплат, для старых оплат — по ценам меню на дату)."""
+    days = days_between(date_from, date_to)
+    prices = meal_prices(date_from, date_to)
+    rows = {(day, meal_type): DailyMealStats(date=day, meal_type=meal_type) for day in days for meal_type in ROLLUP_MEAL_TYPES}
+
+    for day, counters in compute_counters(date_from, date_to).items():
+        for meal_type in ROLLUP_MEAL_TYPES:
+            rows[day, meal_type].active_subscriptions = counters['active_subscriptions']
+
+    for row in MealIssued.objects.filter(date__gte=date_from, date__lte=date_to).values(
+        'date', 'meal_type'
+    ).annotate(total=Count('id')):
+        if (row['date'], row['meal_type']) in rows:
+            rows[row['date'], row['meal_type']].issued = row['total']
+
+    for row in MealPayment.objects.filter(date__gte=date_from, date__lte=date_to).values(
+        'date', 'meal_type'
+    ).annotate(total=Count('id'), paid=Sum('amount'), unpriced=Count('id', filter=Q(amount__isnull=True))):
+        stats = rows.get((row['date'], row['meal_type']))
+        if stats:
+            stats.one_time_payments = row['total']
+            stats.revenue = (row['paid'] or 0) + prices[row['date'], row['meal_type']] * row['unpriced']
+
+    with transaction.atomic(using=current_db()):
+        DailyMealStats.objects.filter(date__gte=date_from, date__lte=date_to).delete()
+        DailyMealStats.objects.bulk_create(rows.values(), batch_size=500)
+    return len(rows)
+
+
+def range_report(date_from, date_to):
+    """Отчёт за период только по сводкам: O(дней), а не O(строк)."""
+    days = {
+        day: {'date': day, 'breakfast_count': 0, 'lunch_count': 0, 'combined_count': 0, 'meals_issued': 0,
+              'one_time_payments': 0, 'active_subscriptions': 0, 'revenue': Decimal('0')}
+        for day in days_between(date_from, date_to)
+    }
+    for stats in DailyMealStats.objects.filter(date__gte=date_from, date__lte=date_to):
+        day = days[stats.date]
+        day[f'{stats.meal_type}_count'] = stats.issued
+        day['meals_issued'] += stats.issued
+        day['one_time_payments'] += stats.one_time_payments
+        day['active_subscriptions'] = max(day['active_subscriptions'], stats.active_subscriptions)
+        day['revenue'] += stats.revenue
+
+    return {
+        'date_from': date_from,
+        'date_to': date_to,
+        'totals': {
+            key: sum(day[key] for day in days.values())
+            for key in ('meals_issued', 'one_time_payments', 'revenue')
+        },
+        'days': list(days.values()),
+    }
@@ -0,0 +1,119 @@
+# api/roster
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import User, MealPayment, MealEligibility, RosterDay
+from .subscriptions import covered_users, is_covered
+from .tenancy import current_db
+
+
+ROSTER_MEAL_TYPES = ('breakfast', 'lunch', 'combined')
+
+
+def paid_user_ids(date_obj, meal_type):
+    return MealPayment.objects.filter(date=date_obj, meal_type=meal_type).values_list('user_id', flat=True)
+
+
+def roster_users(date_obj, meal_type):
+    return User.objects.filter(
+        mealeligibility__date=date_obj,
+        mealeligibility__meal_type=meal_type
+    ).values('id', 'username', 'role')
+
+
+def eligibility(date_obj, meal_type, user_ids):
+    return MealEligibility.objects.filter(date=date_obj, meal_type=meal_type, user_id__in=user_ids)
+
+
+def live_user_ids(date_obj, meal_type):
+    """Считает список напрямую по MealPayment и индексу абонементов."""
+    return set(paid_user_ids(date_obj, meal_type)) | covered_users(date_obj)
+
+
+def build_roster(date_obj, meal_type):
+    with transaction.atomic(using=current_db()):
+        user_ids = live_user_ids(date_obj, meal_type)
+        MealEligibility.objects.filter(date=date_obj, meal_type=meal_type).delete()
+        MealEligibility.objects.bulk_create(
+            [MealEligibility(date=date_obj, meal_type=meal_type, user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True
+        )
+        RosterDay.objects.update_or_create(date=date_obj, meal_type=meal_type)
+    return user_ids
+
+
+def ensure_roster(date_obj, meal_type):
+    # Отметка «день построен» — строка RosterDay: её удаление в invalidate_roster
+    # видят все процессы, в отличие от флага в локальном кэше
+    if not RosterDay.objects.filter(date=date_obj, meal_type=meal_type).exists():
+        build_roster(date_obj, meal_type)
+
+
+def eligible_users(date_obj, meal_type):
+    ensure_roster(date_obj, meal_type)
+    return roster_users(date_obj, meal_type)
+
+
+def is_eligible(user_id, date_obj, meal_type):
+    # Абонемент покрывает все приёмы пищи — такие ученики проверяются без базы
+    if is_covered(user_id, date_obj):
+        return True
+    ensure_roster(date_obj, meal_type)
+    return eligibility(date_obj, meal_type, [user_id]).exists()
+
+
+def invalidate_roster(date_from, date_to=None, meal_types=ROSTER_MEAL_TYPES):
+    """Сбрасывает построенные дни; они будут пересобраны при следующем чтении."""
+    RosterDay.objects.filter(
+        date__gte=date_from, date__lte=date_to or date_from, meal_type__in=meal_types
+    ).delete()
+
+
+def add_payments(payments):
+    MealEligibility.objects.bulk_create(
+        [MealEligibility(date=payment.date, meal_type=payment.meal_type, user_id=payment.user_id) for payment in payments],
+        ignore_conflicts=True
+    )
+
+
+def add_payment(payment):
+    add_payments([payment])
+
+
+def add_subscription(subscription):
+    # Дописываем только уже построенные дни, остальные соберутся сами при первом чтении
+    built = RosterDay.objects.filter(
+        date__gte=subscription.start_date,
+        date__lte=subscription.end_date
+    ).values_list('date', 'meal_type')
+    MealEligibility.objects.bulk_create(
+        [MealEligibility(date=date_obj, meal_type=meal_type, user_id=subscription.user_id) for date_obj, meal_type in built],
+        ignore_conflicts=True
+    )
+
+
+def check_roster(date_from, date_to):
+    """Сверяет построенные дни с живыми таблицами; возвращает список расхождений."""
+    problems = []
+    days = RosterDay.objects.filter(date__gte=date_from, date__lte=date_to).order_by('date', 'meal_type')
+    for date_obj, meal_type in days.values_list('date', 'meal_type'):
+        stored = set(MealEligibility.objects.filter(
+            date=date_obj, meal_type=meal_type
+        ).values_list('user_id', flat=True))
+        live = live_user_ids(date_obj, meal_type)
+        if stored != live:
+            problems.append({
+                'date': date_obj,
+                'meal_type': meal_type,
+                'missing': sorted(live - stored),
+                'extra': sorted(stored - live),
+            })
+    return problems
+
+
+def date_range(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += timedelta(days=1)
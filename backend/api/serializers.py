@@ -1,10 +1,11 @@
 #api/selializers
 from .models import User
 from rest_framework import serializers
-from .models import MenuItem
+from .models import MenuItem, DatedMenuItem
 from .models import PurchaseRequest, Review
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
+from .tenancy import current_school
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -35,6 +36,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token['username'] = user.username
         token['role'] = user.role
+        token['school'] = current_school()
         return token
 
     def validate(self, attrs):
@@ -57,6 +59,12 @@ class MenuItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'menu_items', 'price', 'available_quantity']
 
 
+class DatedMenuItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DatedMenuItem
+        fields = ['id', 'date', 'meal_type', 'template', 'menu_items', 'price', 'available_quantity']
+
+
 
 class PurchaseRequestSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,103 @@
+# api/signals
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .menu import invalidate_weekly_menu
+from .models import Ingredient, User, MenuItem, DatedMenuItem, MealPayment, Subscription, MealIssued, stock_changed
+from .authentication import forget_user_state
+from . import allergens, roster, reports, rollups, events, subscriptions
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Смена роли или блокировка сразу видна StatelessJWTAuthentication
+    forget_user_state(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход обновляет только last_login — индекс аллергий пересобирать незачем
+    if update_fields is None or 'allergies' in update_fields:
+        allergens.index_user(instance)
+
+
+@receiver([post_save, post_delete, stock_changed], sender=MenuItem)
+@receiver([post_save, post_delete, stock_changed], sender=DatedMenuItem)
+@receiver([post_save, post_delete], sender=Ingredient)
+@receiver(m2m_changed, sender=MenuItem.ingredients.through)
+def menu_item_changed(sender, **kwargs):
+    invalidate_weekly_menu()
+
+
+@receiver(post_save, sender=MenuItem)
+def menu_item_indexed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'menu_items' in update_fields:
+        allergens.index_menu_item(instance)
+
+
+@receiver(post_save, sender=DatedMenuItem)
+def menu_item_saved(sender, instance, **kwargs):
+    events.publish('stock', id=instance.pk, available_quantity=instance.available_quantity)
+
+
+@receiver(stock_changed, sender=DatedMenuItem)
+def menu_item_stock_taken(sender, pk, available_quantity, **kwargs):
+    events.publish('stock', id=pk, available_quantity=available_quantity)
+
+
+@receiver(post_save, sender=MealPayment)
+def meal_payment_saved(sender, instance, created, **kwargs):
+    reports.invalidate_days(instance.date)
+    if created:
+        roster.add_payment(instance)
+        rollups.record_payment(instance)
+        events.publish('payment', user_id=instance.user_id, date=instance.date, meal_type=instance.meal_type)
+    else:
+        roster.invalidate_roster(instance.date)
+
+
+@receiver(post_delete, sender=MealPayment)
+def meal_payment_deleted(sender, instance, **kwargs):
+    reports.invalidate_days(instance.date)
+    rollups.record_payment(instance, delta=-1)
+    roster.invalidate_roster(instance.date, meal_types=[instance.meal_type])
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def subscription_changed(sender, **kwargs):
+    # Версия в базе сдвигается в той же транзакции и становится видна вместе с записью
+    subscriptions.invalidate_subscriptions()
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_saved(sender, instance, created, **kwargs):
+    reports.invalidate_days(instance.start_date, instance.end_date)
+    if created:
+        roster.add_subscription(instance)
+        rollups.record_subscription(instance)
+        events.publish(
+            'subscription', user_id=instance.user_id, start_date=instance.start_date, end_date=instance.end_date
+        )
+    else:
+        roster.invalidate_roster(instance.start_date, instance.end_date)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    reports.invalidate_days(instance.start_date, instance.end_date)
+    rollups.record_subscription(instance, delta=-1)
+    roster.invalidate_roster(instance.start_date, instance.end_date)
+
+
+@receiver(post_save, sender=MealIssued)
+def meal_issued_saved(sender, instance, created, **kwargs):
+    reports.invalidate_days(instance.date)
+    if created:
+        rollups.record_issued(instance.date, instance.meal_type)
+        events.publish('issued', user_id=instance.user_id, date=instance.date, meal_type=instance.meal_type)
+
+
+@receiver(post_delete, sender=MealIssued)
+def meal_issued_deleted(sender, instance, **kwargs):
+    reports.invalidate_days(instance.date)
+    rollups.record_issued(instance.date, instance.meal_type, delta=-1)
@@ -0,0 +1,96 @@
+# api/subscriptions
+# Индекс абонементов в памяти процесса: «покрыт ли ученик U на дату D» и «кто покрыт
+# на D» без перебора строк в базе. Индекс собирается лениво одним запросом и пересобирается,
+# когда меняется версия в базе (её сдвигает любая запись Subscription в той же транзакции),
+# так что запись в одном процессе видят все остальные.
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from .models import Subscription
+from .tenancy import current_school
+from .versions import bump_versions, get_version
+
+
+SUBSCRIPTIONS_VERSION = 'subscriptions'
+
+
+class SubscriptionIndex:
+    """Интервалы абонементов, отсортированные по началу, и интервалы каждого ученика.
+
+    Абонемент длится не дольше max_span дней, поэтому на дату D активны только
+    абонементы с началом в [D - max_span, D]: их находит bisect, остальное — проверка конца.
+    """
+
+    def __init__(self, rows):
+        rows = sorted((start.toordinal(), end.toordinal(), user_id) for user_id, start, end in rows)
+        self.starts = [start for start, _, _ in rows]
+        self.ends = [end for _, end, _ in rows]
+        self.user_ids = [user_id for _, _, user_id in rows]
+        self.max_span = max((end - start for start, end, _ in rows), default=0)
+        self.by_user = {}
+        for start, end, user_id in rows:
+            starts, ends = self.by_user.setdefault(user_id, ([], []))
+            starts.append(start)
+            ends.append(end)
+
+    def _window(self, day):
+        return bisect_left(self.starts, day - self.max_span), bisect_right(self.starts, day)
+
+    def covered_users(self, day):
+        day = day.toordinal()
+        lo, hi = self._window(day)
+        return {self.user_ids[i] for i in range(lo, hi) if self.ends[i] >= day}
+
+    def active_count(self, day):
+        day = day.toordinal()
+        lo, hi = self._window(day)
+        return sum(1 for i in range(lo, hi) if self.ends[i] >= day)
+
+    def is_covered(self, user_id, day):
+        intervals = self.by_user.get(user_id)
+        if intervals is None:
+            return False
+        starts, ends = intervals
+        day = day.toordinal()
+        # Интервалы одного ученика не обязаны быть непересекающимися — смотрим все начатые
+        for i in range(bisect_right(starts, day) - 1, bisect_left(starts, day - self.max_span) - 1, -1):
+            if ends[i] >= day:
+                return True
+        return False
+
+
+_indexes = {}  # школа -> (версия, SubscriptionIndex)
+_lock = threading.Lock()
+
+
+def invalidate_subscriptions():
+    bump_versions([SUBSCRIPTIONS_VERSION])
+
+
+def get_index():
+    school = current_school()
+    # Версию читаем до выборки строк: запись во время сборки сдвинет её, и индекс соберётся снова
+    version = get_version(SUBSCRIPTIONS_VERSION)
+    built = _indexes.get(school)
+    if built is not None and built[0] == version:
+        return built[1]
+    with _lock:
+        built = _indexes.get(school)
+        if built is None or built[0] != version:
+            built = _indexes[school] = (
+                version, SubscriptionIndex(Subscription.objects.values_list('user_id', 'start_date', 'end_date'))
+            )
+    return built[1]
+
+
+def is_covered(user_id, day=None):
+    return get_index().is_covered(user_id, day or date.today())
+
+
+def covered_users(day):
+    return get_index().covered_users(day)
+
+
+def active_count(day):
+    return get_index().active_count(day)
@@ -0,0 +1,89 @@
+# api/tenancy
+# Несколько школ в одном развёртывании: у каждой школы своя база (SQLite-файл или
+# схема PostgreSQL) со всеми таблицами. Школа запроса выбирается TenantMiddleware,
+# SchoolRouter отправляет в её базу все запросы ORM, ключи кэша получают её префикс.
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+
+
+# Вне запроса (команды manage.py) школа берётся из переменной окружения SCHOOL
+_current_school = ContextVar('school', default=os.getenv('SCHOOL'))
+
+
+def school_databases():
+    """{школа: алиас базы}; школа по умолчанию живёт в базе 'default'."""
+    return {settings.DEFAULT_SCHOOL: 'default', **{school: f'school_{school}' for school in settings.SCHOOLS}}
+
+
+def current_school():
+    return _current_school.get() or settings.DEFAULT_SCHOOL
+
+
+def current_db():
+    return school_databases()[current_school()]
+
+
+def set_school(school):
+    return _current_school.set(school)
+
+
+@contextmanager
+def use_school(school):
+    if school not in school_databases():
+        raise LookupError(f'Неизвестная школа: {school}')
+    token = _current_school.set(school)
+    try:
+        yield school_databases()[school]
+    finally:
+        _current_school.reset(token)
+
+
+class SchoolRouter:
+    """Все модели, включая auth и sessions, читаются и пишутся в базу текущей школы."""
+
+    def db_for_read(self, model, **hints):
+        return current_db()
+
+    def db_for_write(self, model, **hints):
+        return current_db()
+
+
+def make_cache_key(key, key_prefix, version):
+    # Меню, списки, отчёты и состояние пользователей у каждой школы свои
+    return f'{key_prefix}:{version}:{current_school()}:{key}'
+
+
+class TenantMiddleware:
+    """Выбирает школу по заголовку X-School (или ?school=); без них — DEFAULT_SCHOOL."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _select(self, request):
+        school = request.headers.get('X-School') or request.GET.get('school') or settings.DEFAULT_SCHOOL
+        if school not in school_databases():
+            return JsonResponse({'error': 'Неизвестная школа'}, status=404)
+        # Без reset: каждый запрос выставляет школу сам, а потоковые ответы
+        # (CSV, SSE) дочитывают базу уже после выхода из middleware
+        set_school(school)
+        request.school = school
+        return None
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self._select(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self._select(request) or await self.get_response(request)
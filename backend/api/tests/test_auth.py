@@ -0,0 +1,93 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import MenuItem, User
+from api.serializers import MyTokenObtainPairSerializer
+
+
+def bearer(user):
+    return f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}'
+
+
+class StatelessAuthQueryCountTests(TestCase):
+    """Горячие GET с токеном не читают User: на запрос на один запрос к базе меньше."""
+
+    TODAY = date.today().isoformat()
+    ENDPOINTS = {
+        'cook': [
+            '/api/menu/allergens/',
+            '/api/cook/dashboard/',
+            f'/api/paid-students/?date={TODAY}&meal_type=lunch',
+        ],
+        'admin': [
+            '/api/admin/stats/',
+            f'/api/admin/reports/daily/?date={TODAY}',
+            '/api/admin/purchase-requests/',
+        ],
+        'student': [
+            '/api/menu/weekly/safe/',
+            '/api/user/reviews/',
+            '/api/meal-token/',
+        ],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            'cook': User.objects.create_user('cook', password='x', role='cook'),
+            'admin': User.objects.create_user('admin', password='x', role='admin'),
+            'student': User.objects.create_user('student', password='x', allergies='молоко'),
+        }
+        for day_of_week in range(1, 8):
+            MenuItem.objects.create(
+                day_of_week=day_of_week, meal_type='lunch', menu_items='суп, молоко', price=150, available_quantity=50
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, client, url):
+        # Два прогона прогревают кэши меню, списков и состояния пользователя
+        for _ in range(2):
+            self.assertEqual(client.get(url).status_code, 200, url)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        return len(queries)
+
+    def test_stateless_get_skips_user_query(self):
+        for role, urls in self.ENDPOINTS.items():
+            client = APIClient(HTTP_AUTHORIZATION=bearer(self.users[role]))
+            for url in urls:
+                with self.subTest(url):
+                    with override_settings(STATELESS_JWT_AUTH=False):
+                        full = self.count_queries(client, url)
+                    stateless = self.count_queries(client, url)
+                    self.assertEqual(stateless, full - 1)
+
+    def test_weekly_menu_hot_path_query_counts(self):
+        # Пользователь из базы не загружается: меню из кэша по версии, аллергены одним запросом
+        client = APIClient(HTTP_AUTHORIZATION=bearer(self.users['student']))
+        client.get('/api/menu/weekly/safe/')
+        with self.assertNumQueries(2):  # версия меню и аллергены пользователя
+            client.get('/api/menu/weekly/safe/')
+        with self.assertNumQueries(1):  # версия меню
+            client.get('/api/menu/weekly/')
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        client = APIClient(HTTP_AUTHORIZATION=bearer(self.users['student']))
+        self.assertEqual(client.get('/api/menu/weekly/safe/').status_code, 200)
+        self.users['student'].is_active = False
+        self.users['student'].save()
+        self.assertEqual(client.get('/api/menu/weekly/safe/').status_code, 401)
+
+    def test_role_change_applies_at_once(self):
+        client = APIClient(HTTP_AUTHORIZATION=bearer(self.users['cook']))
+        self.assertEqual(client.get('/api/menu/allergens/').status_code, 200)
+        self.users['cook'].role = 'ученик'
+        self.users['cook'].save()
+        self.assertEqual(client.get('/api/menu/allergens/').status_code, 403)
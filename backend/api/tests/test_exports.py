@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from unittest import skipUnless
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import MealPayment, PurchaseRequest, User
+
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — килобайты
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@skipUnless(resource, 'нужен модуль resource')
+class ExportMemoryTests(TestCase):
+    """Выгрузка идёт потоком: миллион строк не поднимает пик памяти процесса.
+
+    Список из миллиона строк занял бы сотни мегабайт; порция iterator — единицы.
+    """
+
+    MAX_GROWTH_MB = 64
+
+    USERS = 1000
+    DAYS = 1000
+    FIRST_DAY = date(2023, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='x', role='admin')
+        User.objects.bulk_create([User(username=f'student_{i}') for i in range(cls.USERS)])
+        user_ids = list(User.objects.filter(username__startswith='student_').values_list('id', flat=True))
+        # Миллион оплат: bulk_create собирал бы объекты моделей минуты, executemany — секунды
+        paid_at = timezone.now()
+        table = connection.ops.quote_name(MealPayment._meta.db_table)
+        with connection.cursor() as cursor:
+            for day in range(cls.DAYS):
+                cursor.executemany(
+                    f'INSERT INTO {table} (user_id, date, meal_type, paid_at, amount) VALUES (%s, %s, %s, %s, %s)',
+                    [(user_id, cls.FIRST_DAY + timedelta(days=day), 'lunch', paid_at, '150.00') for user_id in user_ids],
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export_rows(self, date_to):
+        response = self.client.get('/api/admin/export/payments/', {
+            'date_from': self.FIRST_DAY.isoformat(), 'date_to': date_to.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        return sum(chunk.count(b'\n') for chunk in response.streaming_content) - 1
+
+    def test_memory_is_flat(self):
+        if connection.vendor == 'sqlite':
+            # Страницы файла, отображённые через mmap, тоже входят в RSS
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA mmap_size=0')
+        # Первая выгрузка прогревает импорты и кэши, от её пика и считаем рост
+        self.assertEqual(self.export_rows(self.FIRST_DAY + timedelta(days=9)), 10 * self.USERS)
+        before = peak_rss_mb()
+
+        self.assertEqual(self.export_rows(self.FIRST_DAY + timedelta(days=self.DAYS - 1)), self.USERS * self.DAYS)
+        self.assertLess(peak_rss_mb() - before, self.MAX_GROWTH_MB)
+
+
+class ExportAccessTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.params = {'date_from': '2026-02-01', 'date_to': '2026-02-28'}
+
+    def test_students_cannot_export(self):
+        self.client.force_authenticate(User.objects.create_user('student', password='x'))
+        self.assertEqual(self.client.get('/api/admin/export/payments/', self.params).status_code, 403)
+
+    def test_purchase_requests_bounded_by_created_at(self):
+        admin = User.objects.create_user('admin', password='x', role='admin')
+        inside = PurchaseRequest.objects.create(product_name='Молоко', quantity=3, unit='л', created_by=admin)
+        PurchaseRequest.objects.filter(pk=inside.pk).update(
+            created_at=timezone.make_aware(timezone.datetime(2026, 2, 28, 23, 30))
+        )
+        outside = PurchaseRequest.objects.create(product_name='Мука', quantity=5, unit='кг', created_by=admin)
+        PurchaseRequest.objects.filter(pk=outside.pk).update(
+            created_at=timezone.make_aware(timezone.datetime(2026, 3, 1, 0, 0))
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.get('/api/admin/export/purchase-requests/', self.params)
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('Молоко', body)
+        self.assertNotIn('Мука', body)
+        self.assertEqual(self.client.get('/api/admin/export/payments/', {
+            'date_from': '2026-02-01', 'date_to': '9999-12-31'
+        }).status_code, 400)
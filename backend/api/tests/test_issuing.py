@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import MealIssued, User
+from api.tests.test_auth import bearer
+
+
+class IssuePermissionTests(TestCase):
+    """Выдавать питание может только персонал: ученик не отмечает выдачу ни себе, ни другим."""
+
+    def setUp(self):
+        self.student = User.objects.create_user('student', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.item = {'user_id': self.student.id, 'meal_type': 'lunch', 'date': date.today().isoformat()}
+
+    def test_students_cannot_issue_batch(self):
+        response = self.client.post('/api/cook/issue-meals/', {'items': [self.item]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(MealIssued.objects.exists())
+
+    def test_cook_can_issue_batch(self):
+        self.client.force_authenticate(User.objects.create_user('cook', password='x', role='cook'))
+        response = self.client.post('/api/cook/issue-meals/', {'items': [self.item]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['status'], 'unpaid')
+
+    def test_students_cannot_sync(self):
+        self.assertEqual(self.client.get('/api/cook/sync/').status_code, 403)
+        response = self.client.post('/api/cook/sync/', {'issues': [self.item]}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(MealIssued.objects.exists())
+
+    def test_cook_can_sync(self):
+        cook = User.objects.create_user('cook', password='x', role='cook')
+        client = APIClient(HTTP_AUTHORIZATION=bearer(cook))
+        self.assertEqual(client.get('/api/cook/sync/').status_code, 200)
@@ -0,0 +1,115 @@
+import threading
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.models import MealPayment, MenuItem, PaymentIdempotencyKey, User
+
+
+class DuplicateCartSubmissionTests(TransactionTestCase):
+    """Одну и ту же корзину отправляют одновременно из нескольких потоков (двойной клик, повтор клиента)."""
+
+    THREADS = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='x')
+        for day_of_week in range(1, 8):
+            MenuItem.objects.create(day_of_week=day_of_week, meal_type='breakfast', menu_items='каша', price=90,
+                                    available_quantity=100)
+            MenuItem.objects.create(day_of_week=day_of_week, meal_type='lunch', menu_items='суп', price=150,
+                                    available_quantity=100)
+        first = date.today() + timedelta(days=1)
+        self.items = [
+            {'date': (first + timedelta(days=i)).isoformat(), 'meal_type': meal_type}
+            for i in range(5) for meal_type in ('breakfast', 'lunch')
+        ]
+
+    def submit_concurrently(self, keys):
+        responses, errors = [], []
+        start = threading.Barrier(len(keys))
+
+        def pay(key):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+            try:
+                start.wait()
+                responses.append(client.post('/api/pay-meal/cart/', {'items': self.items}, format='json', **headers))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=pay, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual([r.status_code for r in responses], [200] * len(keys))
+        return responses
+
+    def test_same_key_pays_once_and_replays(self):
+        responses = self.submit_concurrently(['cart-1'] * self.THREADS)
+
+        replayed = [r for r in responses if r.headers.get('Idempotent-Replayed') == 'true']
+        self.assertEqual(len(replayed), self.THREADS - 1)
+        # Повторы получают ровно тот ответ, что сохранил первый запрос
+        self.assertEqual({str(r.json()) for r in responses}, {str(responses[0].json())})
+        self.assertEqual(responses[0].json()['total'], '1200.00')
+        self.assertEqual(MealPayment.objects.filter(user=self.user).count(), len(self.items))
+        self.assertEqual(PaymentIdempotencyKey.objects.filter(user=self.user).count(), 1)
+
+    def test_without_key_each_item_is_paid_once(self):
+        responses = self.submit_concurrently([None] * self.THREADS)
+
+        paid = [item for r in responses for item in r.json()['items'] if item['status'] == 'paid']
+        self.assertEqual(len(paid), len(self.items))
+        self.assertEqual(sum(float(r.json()['total']) for r in responses), 1200.0)
+        self.assertEqual(MealPayment.objects.filter(user=self.user).count(), len(self.items))
+
+    def test_key_reused_for_another_cart(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post(
+            '/api/pay-meal/cart/', {'items': self.items[:2]}, format='json', HTTP_IDEMPOTENCY_KEY='cart-2'
+        ).status_code, 200)
+        response = client.post(
+            '/api/pay-meal/cart/', {'items': self.items[2:4]}, format='json', HTTP_IDEMPOTENCY_KEY='cart-2'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MealPayment.objects.filter(user=self.user).count(), 2)
+
+
+class CartPriceTests(TestCase):
+    """Цена позиции берётся из меню на дату; без меню позиция не продаётся."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = date.today() + timedelta(days=1)
+        MenuItem.objects.create(day_of_week=self.day.isoweekday(), meal_type='lunch', menu_items='суп', price=150,
+                                available_quantity=100)
+
+    def pay(self, meal_type):
+        return self.client.post(
+            '/api/pay-meal/cart/', {'items': [{'date': self.day.isoformat(), 'meal_type': meal_type}]}, format='json'
+        )
+
+    def test_meal_without_menu_is_rejected(self):
+        response = self.pay('breakfast')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Нет меню', response.json()['error'])
+
+    def test_combined_needs_breakfast_and_lunch(self):
+        self.assertEqual(self.pay('combined').status_code, 400)
+        self.assertFalse(MealPayment.objects.exists())
+
+        MenuItem.objects.create(day_of_week=self.day.isoweekday(), meal_type='breakfast', menu_items='каша',
+                                price=90, available_quantity=100)
+        response = self.pay('combined')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], '240.00')
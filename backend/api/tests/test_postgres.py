@@ -0,0 +1,99 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from glob import glob
+from pathlib import Path
+from unittest import SkipTest
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+BACKEND_DIR = Path(settings.BASE_DIR)
+
+
+def find_pg_bin(name):
+    # Debian/Ubuntu кладут initdb и pg_ctl не в PATH, а в /usr/lib/postgresql/<версия>/bin
+    return shutil.which(name) or next(iter(sorted(glob(f'/usr/lib/postgresql/*/bin/{name}'), reverse=True)), None)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ThrowawayPostgres:
+    """Временный кластер PostgreSQL в каталоге tmp: initdb, pg_ctl start, по выходе — stop и удаление.
+
+    TEST_DATABASE_URL указывает на готовую пустую базу вместо запуска своей.
+    """
+
+    def __enter__(self):
+        url = os.getenv('TEST_DATABASE_URL')
+        if url:
+            return url
+
+        initdb, pg_ctl = find_pg_bin('initdb'), find_pg_bin('pg_ctl')
+        if not initdb or not pg_ctl:
+            raise SkipTest('нет initdb/pg_ctl и не задан TEST_DATABASE_URL')
+        if hasattr(os, 'geteuid') and os.geteuid() == 0:
+            raise SkipTest('initdb не запускается от root; задайте TEST_DATABASE_URL')
+
+        self.pg_ctl = pg_ctl
+        self.directory = tempfile.mkdtemp(prefix='canteen-pg-')
+        data = os.path.join(self.directory, 'data')
+        port = free_port()
+        subprocess.run(
+            [initdb, '-D', data, '-U', 'postgres', '--auth=trust', '-E', 'UTF8', '--no-sync'],
+            check=True, capture_output=True,
+        )
+        subprocess.run(
+            [pg_ctl, '-D', data, '-w', '-l', os.path.join(self.directory, 'log'),
+             '-o', f'-p {port} -c listen_addresses=127.0.0.1 -k {self.directory} -c fsync=off', 'start'],
+            check=True, capture_output=True,
+        )
+        self.data = data
+        return f'postgres://postgres@127.0.0.1:{port}/postgres'
+
+    def __exit__(self, *exc_info):
+        if hasattr(self, 'data'):
+            subprocess.run([self.pg_ctl, '-D', self.data, '-m', 'immediate', 'stop'], capture_output=True)
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PostgresMigrationTests(SimpleTestCase):
+    """Миграции и наполнение базы на PostgreSQL с пулом соединений (на SQLite их прогоняет сам test)."""
+
+    def manage(self, url, *args):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, 'manage.py', *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+            env={**os.environ, 'DATABASE_URL': url, 'SCHOOLS': ''},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-3000:])
+        return result.stdout, time.perf_counter() - started
+
+    def test_migrate_seed_and_roll_back(self):
+        with ThrowawayPostgres() as url:
+            self.manage(url, 'migrate', '-v0')
+            self.manage(url, 'seed_school', '--students', '200', '--months', '1')
+            # Откат через RunPython-миграции (GiST-индекс, версии данных) и повторный накат
+            self.manage(url, 'migrate', 'api', '0015', '-v0')
+            self.manage(url, 'migrate', '-v0')
+            output, _ = self.manage(url, 'showmigrations', 'api')
+            self.assertNotIn('[ ]', output)
+
+            import psycopg
+            with psycopg.connect(url.replace('postgres://', 'postgresql://')) as connection:
+                indexes = {row[0] for row in connection.execute(
+                    "SELECT indexname FROM pg_indexes WHERE tablename = 'api_subscription'"
+                )}
+                users = connection.execute("SELECT count(*) FROM api_user WHERE username LIKE 'seed_%'").fetchone()[0]
+            self.assertIn('subscription_active_idx', indexes)
+            self.assertIn('subscription_period_gist', indexes)
+            self.assertEqual(users, 200 + 10 + 3)
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from api.models import DataVersion, MealIssued, User
+from api.reports import invalidate_days
+
+
+class InvalidateDaysTests(TestCase):
+    """Версии дней сдвигаются только для закрытых дней; сегодняшняя выдача строку версии не пишет."""
+
+    def setUp(self):
+        self.student = User.objects.create_user('student', password='x')
+        self.today = date.today()
+
+    def versions(self):
+        return dict(DataVersion.objects.values_list('name', 'version'))
+
+    def test_today_issue_does_not_write_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            MealIssued.objects.create(user=self.student, date=self.today, meal_type='lunch')
+        self.assertNotIn(f'report:day:{self.today}', self.versions())
+
+    def test_backdated_issue_bumps_closed_day(self):
+        yesterday = self.today - timedelta(days=1)
+        MealIssued.objects.create(user=self.student, date=yesterday, meal_type='lunch')
+        before = self.versions()[f'report:day:{yesterday}']
+        MealIssued.objects.create(user=self.student, date=yesterday, meal_type='breakfast')
+        self.assertNotEqual(self.versions()[f'report:day:{yesterday}'], before)
+
+    def test_commit_after_midnight_bumps_today(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_days(self.today)
+        self.assertNotIn(f'report:day:{self.today}', self.versions())
+
+        # Транзакция зафиксировалась уже на следующий день
+        with mock.patch('api.reports.date', wraps=date) as patched:
+            patched.today.return_value = self.today + timedelta(days=1)
+            for callback in callbacks:
+                callback()
+        self.assertIn(f'report:day:{self.today}', self.versions())
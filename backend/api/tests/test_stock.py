@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.models import DatedMenuItem, User
+
+
+class TakePortionsStressTests(TransactionTestCase):
+    """Много поваров одновременно списывают порции одного блюда: без перепродажи."""
+
+    THREADS = 16
+    ATTEMPTS = 25
+    STOCK = 150
+
+    def setUp(self):
+        self.item = DatedMenuItem.objects.create(
+            date=date.today(), meal_type='lunch', menu_items='суп', price=100, available_quantity=self.STOCK
+        )
+
+    def hammer(self, quantity):
+        taken, failed, errors = [], [], []
+        start = threading.Barrier(self.THREADS)
+
+        def cook():
+            try:
+                start.wait()
+                for _ in range(self.ATTEMPTS):
+                    left = DatedMenuItem.objects.take_portions(self.item.pk, quantity)
+                    (failed if left is None else taken).append(left)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=cook) for _ in range(self.THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return taken, failed, errors, time.perf_counter() - started
+
+    def test_no_oversell(self):
+        taken, failed, errors, elapsed = self.hammer(1)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(taken), self.STOCK)
+        self.assertEqual(len(failed), self.THREADS * self.ATTEMPTS - self.STOCK)
+        # Каждый успешный UPDATE вернул свой остаток: ни одно списание не потерялось
+        self.assertEqual(sorted(taken), list(range(self.STOCK)))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.available_quantity, 0)
+        # Пропускная способность: все попытки укладываются в секунды, а не минуты
+        self.assertLess(elapsed, 30, f'{self.THREADS * self.ATTEMPTS / elapsed:.0f} списаний/с')
+
+    def test_partial_quantity_is_not_taken(self):
+        taken, failed, errors, _ = self.hammer(4)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(taken), self.STOCK // 4)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.available_quantity, self.STOCK % 4)
+
+    def test_missing_item(self):
+        with self.assertRaises(DatedMenuItem.DoesNotExist):
+            DatedMenuItem.objects.take_portions(self.item.pk + 1, 1)
+
+
+class IssueMealValidationTests(TestCase):
+    """Неверные meal_id и quantity — ответ 400 или 404, а не ошибка сервера."""
+
+    def setUp(self):
+        self.item = DatedMenuItem.objects.create(
+            date=date.today(), meal_type='lunch', menu_items='суп', price=150, available_quantity=5
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('cook', password='x', role='cook'))
+
+    def issue(self, data):
+        return self.client.post('/api/cook/issue-meal/', data, format='json')
+
+    def test_invalid_meal_id(self):
+        for meal_id in ('abc', None, [1]):
+            with self.subTest(meal_id=meal_id):
+                self.assertEqual(self.issue({'meal_id': meal_id}).status_code, 400)
+        self.assertEqual(self.issue({}).status_code, 400)
+
+    def test_unknown_meal_id(self):
+        self.assertEqual(self.issue({'meal_id': self.item.pk + 1}).status_code, 404)
+        self.assertEqual(self.issue({'meal_id': 10 ** 20}).status_code, 404)
+
+    def test_numeric_string_meal_id(self):
+        response = self.issue({'meal_id': str(self.item.pk), 'quantity': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['new_quantity'], 3)
@@ -1,22 +1,39 @@
 # api/urls.py
 from django.urls import path
-from . import views
+from . import views, async_views
 
 urlpatterns = [
     path("menu/weekly/", views.WeeklyMenuView.as_view(), name="weekly-menu"),
+    path("menu/weekly/safe/", views.SafeWeeklyMenuView.as_view(), name="safe-weekly-menu"),
+    path("menu/allergens/", views.MenuAllergensView.as_view(), name="menu-allergens"),
     path("user/me/", views.UserDetailView.as_view(), name="user-detail"),
     path("cook/dashboard/", views.CookDashboardView.as_view(), name="cook-dashboard"),
     path("cook/issue-meal/", views.IssueMealView.as_view(), name="issue-meal"),
     path("cook/purchase-requests/", views.CreatePurchaseRequestView.as_view(), name="create-purchase-request"),
     path("pay-meal/", views.PayMealView.as_view(), name="pay-meal"),
+    path("pay-meal/cart/", views.PayCartView.as_view(), name="pay-meal-cart"),
     path("buy-subscription/", views.BuySubscriptionView.as_view(), name="buy-subscription"),
     path("paid-students/", views.PaidStudentsView.as_view(), name="paid-students"),
     path("issue-meal-for-user/", views.IssueMealForUserView.as_view()),
     path("cook/issue-meal-for-user/", views.IssueMealForUserView.as_view(), name="issue-meal-for-user"),
+    path("cook/issue-meals/", views.IssueMealsBatchView.as_view(), name="issue-meals-batch"),
+    path("cook/scan/", views.ScanMealView.as_view(), name="cook-scan"),
+    path("meal-token/", views.MealTokenView.as_view(), name="meal-token"),
+    path("cook/sync/", views.CookSyncView.as_view(), name="cook-sync"),
     path("admin/stats/", views.AdminStatsView.as_view(), name="admin-stats"),
     path("admin/purchase-requests/", views.AdminPurchaseRequestsView.as_view(), name="admin-purchase-requests"),
     path("admin/approve-request/<int:pk>/", views.ApprovePurchaseRequestView.as_view(), name="approve-purchase-request"),
     path("admin/reports/daily/", views.DailyReportView.as_view(), name="daily-report"),
+    path("admin/reports/range/", views.RangeReportView.as_view(), name="range-report"),
+    path("admin/forecast/", views.ForecastView.as_view(), name="forecast"),
+    path("admin/export/<str:kind>/", views.ExportView.as_view(), name="export"),
+    path("admin/metrics/", views.MetricsView.as_view(), name="metrics"),
     path("reviews/", views.CreateReviewView.as_view(), name="create-review"),
     path("user/reviews/", views.UserReviewsView.as_view(), name="user-reviews"),
+    # Асинхронные варианты для запуска под ASGI (backend/asgi.py)
+    path("async/menu/weekly/", async_views.AsyncWeeklyMenuView.as_view(), name="async-weekly-menu"),
+    path("async/paid-students/", async_views.AsyncPaidStudentsView.as_view(), name="async-paid-students"),
+    path("async/admin/stats/", async_views.AsyncAdminStatsView.as_view(), name="async-admin-stats"),
+    path("async/admin/reports/daily/", async_views.AsyncDailyReportView.as_view(), name="async-daily-report"),
+    path("cook/live/", async_views.LiveFeedView.as_view(), name="cook-live-feed"),
 ]
\ No newline at end of file
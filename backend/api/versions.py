@@ -0,0 +1,29 @@
+# api/versions
+# Версии данных в базе. LocMem-кэш у каждого процесса свой, поэтому сброс кэша
+# в одном процессе не виден остальным; версия в базе общая. Значение, вычисленное
+# в процессе, хранится вместе с версией и пересчитывается, когда версия в базе сменилась.
+from uuid import uuid4
+
+from .models import DataVersion
+
+
+def get_versions(names):
+    """{имя: версия} одним запросом; для ещё не сдвинутых имён — ''."""
+    versions = dict(DataVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    return {name: versions.get(name, '') for name in names}
+
+
+def get_version(name):
+    return get_versions([name])[name]
+
+
+async def aget_version(name):
+    return await DataVersion.objects.filter(name=name).values_list('version', flat=True).afirst() or ''
+
+
+def bump_versions(names):
+    """Сдвигает версии одним upsert; внутри транзакции новая версия видна вместе с записью данных."""
+    DataVersion.objects.bulk_create(
+        [DataVersion(name=name, version=uuid4().hex) for name in set(names)],
+        update_conflicts=True, unique_fields=['name'], update_fields=['version'],
+    )
@@ -1,15 +1,40 @@
 # api/views
 from django.shortcuts import render
-from .models import User, MenuItem, PurchaseRequest, MealPayment, Subscription, MealIssued, Review
+from .models import User, DatedMenuItem, PurchaseRequest, Subscription, MealIssued, Review
 from rest_framework import generics
-from .serializers import UserSerializer, MyTokenObtainPairSerializer, MenuItemSerializer, PurchaseRequestSerializer, ReviewSerializer
+from .serializers import UserSerializer, MyTokenObtainPairSerializer, DatedMenuItemSerializer, PurchaseRequestSerializer, ReviewSerializer
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+import json
+from collections import Counter
 from datetime import date, datetime, timedelta
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from rest_framework.settings import api_settings
+from .menu import dated_menu, get_weekly_menu, parse_menu_date, parse_menu_day, week_start, weekly_menu_response
+from .allergens import affected_users, menu_ingredients, mark_safe_menu, user_allergen_names
+from .issuing import issue_meals, issue_scanned, day_snapshot, MAX_BATCH_SIZE
+from .meal_tokens import make_token, read_token
+from .payments import pay_cart
+from .roster import ROSTER_MEAL_TYPES, eligible_users, is_eligible
+from .subscriptions import is_covered
+from .reports import day_counters
+from .rollups import range_report
+from .forecast import forecast_day
+from .exports import EXPORTS, stream_csv
+from .pagination import keyset_page, page_size
+from .authentication import StatelessAuthMixin, StatelessReadMixin
+from .permissions import IsAdminRole, IsCookRole
+from .metrics import prometheus_text, window_summary
+from .renderers import ColumnarJSONRenderer, PrometheusTextRenderer
 
 
 
@@ -32,41 +57,88 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
-class WeeklyMenuView(APIView):
+class WeeklyMenuView(StatelessReadMixin, APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        weekly_menu = {}
-        for day in range(1, 8):
-            breakfast = MenuItemSerializer(
-                MenuItem.objects.filter(day_of_week=day, meal_type='breakfast'),
-                many=True
-            ).data
-            lunch = MenuItemSerializer(
-                MenuItem.objects.filter(day_of_week=day, meal_type='lunch'),
-                many=True
-            ).data
-            weekly_menu[day] = {
-                'breakfast': breakfast,
-                'lunch': lunch
-            }
-        
+        return weekly_menu_response(request)
+
+
+class SafeWeeklyMenuView(StatelessReadMixin, APIView):
+    """Недельное меню с пометкой safe/allergens для текущего пользователя."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            day = parse_menu_date(request)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=400)
+
+        _, body = get_weekly_menu(day)
+        weekly_menu = mark_safe_menu(json.loads(body), user_allergen_names(request.user.id))
         return Response(weekly_menu)
 
 
+class MenuAllergensView(StatelessReadMixin, APIView):
+    """Для каждого блюда недели (?date=) — ученики с аллергией на его состав; только персоналу."""
+    permission_classes = [IsCookRole]
+
+    def get(self, request):
+        try:
+            monday = week_start(parse_menu_date(request) or date.today())
+        except ValueError as error:
+            return Response({'error': str(error)}, status=400)
+
+        # Те же строки на даты, что отдаёт недельное меню
+        items = dated_menu(monday, monday + timedelta(days=6))
+        dishes = menu_ingredients(items)
+        affected = affected_users(dishes)
+
+        result = []
+        for item in items:
+            key = (item.date, item.meal_type)
+            users = affected[key]
+            result.append({
+                'id': item.id,
+                'date': item.date,
+                'day_of_week': item.date.isoweekday(),
+                'meal_type': item.meal_type,
+                'ingredients': sorted(dishes[key].values()),
+                'affected_count': len(users),
+                'affected_users': sorted(users),
+            })
+        return Response(result)
+
 
 
-class CookDashboardView(APIView):
+
+class CookDashboardView(StatelessReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
+    MAX_DAYS = 31
+
+    def get_queryset(self):
+        # Заявки повара
+        return PurchaseRequest.objects.filter(created_by_id=self.request.user.id)
+
     def get(self, request):
-        # Получаем все блюда (завтрак/обед) с остатками
-        menu_items = MenuItem.objects.all()
-        menu_data = MenuItemSerializer(menu_items, many=True).data
+        # Блюда с остатками на окно дат: по умолчанию сегодня и шесть дней вперёд
+        params = request.query_params
+        try:
+            date_from = parse_menu_day(params['date_from']) if 'date_from' in params else date.today()
+            date_to = parse_menu_day(params['date_to']) if 'date_to' in params else date_from + timedelta(days=6)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=400)
+        if date_to < date_from or (date_to - date_from).days >= self.MAX_DAYS:
+            return Response({'error': f'Окно дат должно быть от 1 до {self.MAX_DAYS} дней'}, status=400)
+
+        # Строки на даты создаём только для повара: ему нужны их id для выдачи
+        is_cook = IsCookRole().has_permission(request, self)
+        menu_data = DatedMenuItemSerializer(
+            dated_menu(date_from, date_to, materialize_missing=is_cook), many=True
+        ).data
 
-        # Получаем заявки повара
-        requests = PurchaseRequest.objects.filter(created_by=request.user)
-        requests_data = PurchaseRequestSerializer(requests, many=True).data
+        requests_data = PurchaseRequestSerializer(self.get_queryset(), many=True).data
 
         return Response({
             'menu_items': menu_data,
@@ -77,20 +149,27 @@ class IssueMealView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        meal_id = request.data.get('meal_id')
-        quantity = int(request.data.get('quantity', 1))
-        
         try:
-            meal = MenuItem.objects.get(id=meal_id)
-            if meal.available_quantity >= quantity:
-                meal.available_quantity -= quantity
-                meal.save()
-                return Response({'message': 'Выдано успешно', 'new_quantity': meal.available_quantity})
-            else:
-                return Response({'error': 'Недостаточно порций'}, status=400)
-        except MenuItem.DoesNotExist:
+            meal_id = int(request.data.get('meal_id'))
+        except (TypeError, ValueError):
+            return Response({'error': 'Поле "meal_id" должно быть числом'}, status=400)
+        try:
+            quantity = int(request.data.get('quantity', 1))
+        except (TypeError, ValueError):
+            return Response({'error': 'Неверное количество порций'}, status=400)
+        if quantity < 1:
+            return Response({'error': 'Неверное количество порций'}, status=400)
+
+        try:
+            # meal_id — строка меню на дату из cook/dashboard, у каждой даты свой остаток
+            new_quantity = DatedMenuItem.objects.take_portions(meal_id, quantity)
+        except DatedMenuItem.DoesNotExist:
             return Response({'error': 'Блюдо не найдено'}, status=404)
 
+        if new_quantity is None:
+            return Response({'error': 'Недостаточно порций'}, status=400)
+        return Response({'message': 'Выдано успешно', 'new_quantity': new_quantity})
+
 class CreatePurchaseRequestView(generics.CreateAPIView):
     serializer_class = PurchaseRequestSerializer
     permission_classes = [IsAuthenticated]
@@ -112,18 +191,41 @@ class PayMealView(APIView):
             return Response({'error': 'Поле "date" и "meal_type" обязательны'}, status=400)
 
         try:
-            from datetime import datetime
             date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
         except ValueError:
             return Response({'error': 'Неверный формат даты (ожидается YYYY-MM-DD)'}, status=400)
 
-        # Проверка: уже оплачено?
-        if MealPayment.objects.filter(user=request.user, date=date_str, meal_type=meal_type).exists():
+        # Корзина из одной позиции: вставка без гонки exists()/create() и с ценой из меню
+        try:
+            result, _ = pay_cart(
+                request.user, [{'date': date_obj.isoformat(), 'meal_type': meal_type}],
+                request.headers.get('Idempotency-Key')
+            )
+        except ValueError as error:
+            return Response({'error': str(error)}, status=400)
+
+        item = result['items'][0]
+        if item['status'] == 'already_paid':
             return Response({'error': 'Уже оплачено'}, status=400)
+        return Response({'message': 'Оплачено успешно', 'amount': item['amount']})
+
 
-        # Создаём запись об оплате
-        MealPayment.objects.create(user=request.user, date=date_str, meal_type=meal_type)
-        return Response({'message': 'Оплачено успешно'})
+class PayCartView(APIView):
+    """Оплата нескольких дней и приёмов пищи одним запросом.
+
+    Повтор с тем же заголовком Idempotency-Key возвращает первый ответ
+    (с заголовком Idempotent-Replayed) и не списывает оплату повторно.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            result, replayed = pay_cart(request.user, request.data.get('items'), request.headers.get('Idempotency-Key'))
+        except ValueError as error:
+            return Response({'error': str(error)}, status=400)
+
+        headers = {'Idempotent-Replayed': 'true'} if replayed else None
+        return Response(result, headers=headers)
 
 
 
@@ -133,11 +235,7 @@ class BuySubscriptionView(APIView):
     def post(self, request):
         today = date.today()
         # Проверяем: нет ли уже активного абонемента
-        if Subscription.objects.filter(
-            user=request.user,
-            start_date__lte=today,
-            end_date__gte=today
-        ).exists():
+        if is_covered(request.user.id, today):
             return Response({'error': 'У вас уже есть действующий абонемент'}, status=400)
 
         # Создаём новый
@@ -150,8 +248,10 @@ class BuySubscriptionView(APIView):
 
 
 
-class PaidStudentsView(APIView):
+@method_decorator(gzip_page, name='dispatch')
+class PaidStudentsView(StatelessReadMixin, APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
 
     def get(self, request):
         target_date = request.query_params.get('date')
@@ -159,33 +259,16 @@ class PaidStudentsView(APIView):
 
         if not target_date or not meal_type:
             return Response({'error': 'Укажите date и meal_type'}, status=400)
+        if meal_type not in ROSTER_MEAL_TYPES:
+            return Response({'error': 'Неизвестный meal_type'}, status=400)
 
-        # Ученики, оплатившие (разовая оплата или абонемент)
-        from datetime import datetime
-        date_obj = datetime.strptime(target_date, '%Y-%m-%d').date()
-
-        paid_users = []
-
-        # 1. Разовая оплата
-        meal_payments = MealPayment.objects.filter(
-            date=target_date,
-            meal_type=meal_type
-        ).select_related('user')
-
-        # 2. Абонемент
-        subscriptions = Subscription.objects.filter(
-            start_date__lte=date_obj,
-            end_date__gte=date_obj
-        ).select_related('user')
-
-        user_ids = set()
-        for p in meal_payments:
-            user_ids.add(p.user_id)
-        for s in subscriptions:
-            user_ids.add(s.user_id)
+        try:
+            date_obj = datetime.strptime(target_date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'Неверный формат даты (ожидается YYYY-MM-DD)'}, status=400)
 
-        users = User.objects.filter(id__in=user_ids).values('id', 'username', 'role')
-        return Response(list(users))
+        # Ученики, оплатившие (разовая оплата или абонемент) — из материализованного списка
+        return Response(list(eligible_users(date_obj, meal_type)))
 
 
 
@@ -202,6 +285,8 @@ class IssueMealForUserView(APIView):
             return Response({
                 'error': 'Обязательные поля: user_id, meal_type, date'
             }, status=status.HTTP_400_BAD_REQUEST)
+        if meal_type not in ROSTER_MEAL_TYPES:
+            return Response({'error': 'Неизвестный meal_type'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             user = User.objects.get(id=user_id)
@@ -216,19 +301,7 @@ class IssueMealForUserView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Проверка оплаты: разовая + абонемент
-        paid_by_payment = MealPayment.objects.filter(
-            user=user,
-            date=date_str,          # ← если поле DateField, лучше использовать date_obj
-            meal_type=meal_type
-        ).exists()
-
-        paid_by_subscription = Subscription.objects.filter(
-            user=user,
-            start_date__lte=date_obj,
-            end_date__gte=date_obj
-        ).exists()
-
-        if not (paid_by_payment or paid_by_subscription):
+        if not is_eligible(user.id, date_obj, meal_type):
             return Response({
                 'error': 'Ученик не оплатил питание на эту дату и тип блюда'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -260,49 +333,137 @@ class IssueMealForUserView(APIView):
 
 
 
-class AdminStatsView(APIView):
+class MealTokenView(StatelessReadMixin, APIView):
+    """Короткоживущий талон ученика на сегодня для QR-кода на раздаче."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        today = date.today()
-        one_week_ago = today - timedelta(days=7)
+        return Response({
+            'token': make_token(request.user.id, request.user.username),
+            'expires_in': settings.MEAL_TOKEN_MAX_AGE,
+        })
+
+
+class ScanMealView(StatelessAuthMixin, APIView):
+    """Выдача по QR-талону: подпись проверяется без базы, право и выдача — одной транзакцией."""
+    permission_classes = [IsCookRole]
+
+    def post(self, request):
+        meal_type = request.data.get('meal_type')
+        if meal_type not in ROSTER_MEAL_TYPES:
+            return Response({'error': 'Неизвестный meal_type'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            user_id, username, date_obj = read_token(request.data.get('token'))
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = {'user_id': user_id, 'username': username, 'meal_type': meal_type, 'date': date_obj}
+        item_status = issue_scanned(user_id, date_obj, meal_type)
+        if item_status == 'unpaid':
+            return Response({**result, 'error': 'Ученик не оплатил питание на эту дату и тип блюда'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({**result, 'status': item_status})
+
+
+class IssueMealsBatchView(APIView):
+    permission_classes = [IsCookRole]
+
+    def post(self, request):
+        items = request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Поле "items" должно быть непустым списком'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response({
+                'error': f'Не более {MAX_BATCH_SIZE} записей за один запрос'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'results': issue_meals(items)})
+
+
+
 
-        today_payments = MealPayment.objects.filter(date=today).count()
-        active_subscriptions = Subscription.objects.filter(
-            start_date__lte=today,
-            end_date__gte=today
-        ).count()
-        unique_students_today = MealIssued.objects.filter(date=today).values('user').distinct().count()
-        meals_issued_today = MealIssued.objects.filter(date=today).count()
 
+@method_decorator(gzip_page, name='dispatch')
+class CookSyncView(StatelessReadMixin, APIView):
+    # В снимке — id и логины всех питающихся школы, поэтому только для персонала
+    permission_classes = [IsCookRole]
+
+    def get(self, request):
+        date_str = request.query_params.get('date')
+        try:
+            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else date.today()
+        except ValueError:
+            return Response({'error': 'Неверный формат даты (ожидается YYYY-MM-DD)'}, status=400)
+
+        snapshot = day_snapshot(date_obj)
+        snapshot['generated_at'] = timezone.now()
+        return Response(snapshot)
+
+    def post(self, request):
+        # Выдачи, записанные без сети; повторная отправка безопасна — дубликаты вернутся как already_issued
+        issues = request.data.get('issues')
+        if not isinstance(issues, list) or not issues:
+            return Response({'error': 'Поле "issues" должно быть непустым списком'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(issues) > MAX_BATCH_SIZE:
+            return Response({
+                'error': f'Не более {MAX_BATCH_SIZE} записей за один запрос'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        results = issue_meals(issues)
         return Response({
-            'today_payments': today_payments,
-            'active_subscriptions': active_subscriptions,
-            'unique_students_today': unique_students_today,
-            'meals_issued_today': meals_issued_today,
+            'results': results,
+            'summary': Counter(result['status'] for result in results),
         })
 
 
-class AdminPurchaseRequestsView(generics.ListAPIView):
+
+
+class AdminStatsView(StatelessReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        today = date.today()
+        counters = day_counters(today)[today]
+
+        return Response({
+            'today_payments': counters['one_time_payments'],
+            'active_subscriptions': counters['active_subscriptions'],
+            'unique_students_today': counters['unique_students'],
+            'meals_issued_today': counters['meals_issued'],
+        })
+
+
+class AdminPurchaseRequestsView(StatelessReadMixin, generics.ListAPIView):
     serializer_class = PurchaseRequestSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return PurchaseRequest.objects.select_related('created_by').all()
+        queryset = PurchaseRequest.objects.all()
+        params = self.request.query_params
+
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        if params.get('created_by'):
+            queryset = queryset.filter(created_by__username=params['created_by'])
+        # Границы по самому created_at, чтобы поиск шёл по индексу
+        if params.get('date_from'):
+            day = datetime.strptime(params['date_from'], '%Y-%m-%d')
+            queryset = queryset.filter(created_at__gte=timezone.make_aware(day))
+        if params.get('date_to'):
+            day = datetime.strptime(params['date_to'], '%Y-%m-%d') + timedelta(days=1)
+            queryset = queryset.filter(created_at__lt=timezone.make_aware(day))
+
+        return queryset.values(
+            'id', 'product_name', 'quantity', 'unit', 'status', 'created_at',
+            created_by_username=F('created_by__username'),
+        )
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        data = []
-        for req in queryset:
-            data.append({
-                'id': req.id,
-                'product_name': req.product_name,
-                'quantity': req.quantity,
-                'unit': req.unit,
-                'status': req.status,
-                'created_by_username': req.created_by.username,
-            })
-        return Response(data)
+        try:
+            data, next_cursor = keyset_page(self.get_queryset(), request.query_params.get('cursor'), page_size(request))
+        except (ValueError, ValidationError):
+            return Response({'error': 'Неверный курсор или фильтр'}, status=400)
+        return Response({'results': data, 'next_cursor': next_cursor})
 
 
 class ApprovePurchaseRequestView(APIView):
@@ -320,7 +481,7 @@ class ApprovePurchaseRequestView(APIView):
         return Response({'message': 'Статус обновлён'})
 
 
-class DailyReportView(APIView):
+class DailyReportView(StatelessReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -333,29 +494,93 @@ class DailyReportView(APIView):
         except ValueError:
             return Response({'error': 'Неверный формат даты'}, status=400)
 
-        breakfast_count = MealIssued.objects.filter(date=target_date_str, meal_type='breakfast').count()
-        lunch_count = MealIssued.objects.filter(date=target_date_str, meal_type='lunch').count()
-
-        subscriptions_used = Subscription.objects.filter(
-            start_date__lte=target_date,
-            end_date__gte=target_date
-        ).count()
-
-        one_time_payments = MealPayment.objects.filter(date=target_date_str).count()
-        meals_issued = MealIssued.objects.filter(date=target_date_str).count()
+        counters = day_counters(target_date)[target_date]
 
         return Response({
             'date': target_date_str,
-            'breakfast_count': breakfast_count,
-            'lunch_count': lunch_count,
-            'subscriptions_used': subscriptions_used,
-            'one_time_payments': one_time_payments,
-            'meals_issued': meals_issued,
+            'breakfast_count': counters['breakfast_count'],
+            'lunch_count': counters['lunch_count'],
+            'subscriptions_used': counters['active_subscriptions'],
+            'one_time_payments': counters['one_time_payments'],
+            'meals_issued': counters['meals_issued'],
         })
 
 
 
 
+class RangeReportView(StatelessReadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 731
+
+    def get(self, request):
+        try:
+            date_from = datetime.strptime(request.query_params.get('date_from', ''), '%Y-%m-%d').date()
+            date_to = datetime.strptime(request.query_params.get('date_to', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'Укажите date_from и date_to в формате YYYY-MM-DD'}, status=400)
+
+        if date_to < date_from:
+            return Response({'error': 'date_to раньше date_from'}, status=400)
+        if (date_to - date_from).days >= self.MAX_DAYS:
+            return Response({'error': f'Период не может быть длиннее {self.MAX_DAYS} дней'}, status=400)
+
+        return Response(range_report(date_from, date_to))
+
+
+class ForecastView(StatelessReadMixin, APIView):
+    """Прогноз порций завтрака и обеда на дату (по умолчанию на завтра)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        target_date_str = request.query_params.get('date')
+        if target_date_str:
+            try:
+                target_date = datetime.strptime(target_date_str, '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': 'Неверный формат даты'}, status=400)
+        else:
+            target_date = date.today() + timedelta(days=1)
+
+        return Response(forecast_day(target_date))
+
+
+
+
+class MetricsView(StatelessReadMixin, APIView):
+    """Гистограммы запросов по представлениям; ?format=prometheus или Accept: text/plain — для Prometheus."""
+    permission_classes = [IsAdminRole]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, PrometheusTextRenderer]
+
+    def get(self, request):
+        if request.accepted_renderer.format == 'prometheus':
+            return Response(prometheus_text())
+        return Response(window_summary())
+
+
+
+
+class ExportView(StatelessReadMixin, APIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            return Response({'error': f'Доступные выгрузки: {", ".join(EXPORTS)}'}, status=404)
+
+        try:
+            date_from = datetime.strptime(request.query_params.get('date_from', ''), '%Y-%m-%d').date()
+            date_to = datetime.strptime(request.query_params.get('date_to', ''), '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'error': 'Укажите date_from и date_to в формате YYYY-MM-DD'}, status=400)
+        if date_to < date_from or date_to >= date.max:
+            return Response({'error': 'Неверный диапазон дат'}, status=400)
+
+        response = StreamingHttpResponse(stream_csv(kind, date_from, date_to), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{kind}_{date_from}_{date_to}.csv"'
+        return response
+
+
+
+
 class CreateReviewView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -368,9 +593,27 @@ class CreateReviewView(APIView):
 
 
 
-class UserReviewsView(generics.ListAPIView):
+class UserReviewsView(StatelessReadMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Review.objects.filter(user=self.request.user).order_by('-created_at')
\ No newline at end of file
+        queryset = Review.objects.filter(user_id=self.request.user.id)
+        params = self.request.query_params
+
+        if params.get('meal_type'):
+            queryset = queryset.filter(meal_type=params['meal_type'])
+        if params.get('date_from'):
+            queryset = queryset.filter(date__gte=params['date_from'])
+        if params.get('date_to'):
+            queryset = queryset.filter(date__lte=params['date_to'])
+
+        return queryset.values('id', 'created_at', *ReviewSerializer.Meta.fields)
+
+    def list(self, request, *args, **kwargs):
+        try:
+            rows, next_cursor = keyset_page(self.get_queryset(), request.query_params.get('cursor'), page_size(request))
+        except (ValueError, ValidationError):
+            return Response({'error': 'Неверный курсор или фильтр'}, status=400)
+        data = [{field: row[field] for field in ReviewSerializer.Meta.fields} for row in rows]
+        return Response({'results': data, 'next_cursor': next_cursor})
@@ -24,14 +24,20 @@ const WeeklyMenu = () => {
             setLoading(true);
             setError(null);
             try {
-                const response = await fetch('/api/menu/weekly/');
-                if (!response.ok) throw new Error('Ошибка загрузки меню');
-                const menuData = await response.json();
-
                 // Найти понедельник текущей недели
                 const monday = new Date(currentDate);
                 monday.setDate(currentDate.getDate() - currentDate.getDay() + 1); // getDay()=0→Вс, 1→Пн → +1 чтобы получить Пн
 
+                // Меню на даты: запрашиваем именно эту неделю (YYYY-MM-DD по местному времени)
+                const mondayParam = [
+                    monday.getFullYear(),
+                    String(monday.getMonth() + 1).padStart(2, '0'),
+                    String(monday.getDate()).padStart(2, '0')
+                ].join('-');
+                const response = await fetch(`/api/menu/weekly/?date=${mondayParam}`);
+                if (!response.ok) throw new Error('Ошибка загрузки меню');
+                const menuData = await response.json();
+
                 const weekDays = [];
                 for (let i = 0; i < 7; i++) {
                     const date = new Date(monday);
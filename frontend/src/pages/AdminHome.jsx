@@ -28,7 +28,7 @@ const AdminHome = () => {
                 const reqRes = await fetch('/api/admin/purchase-requests/', { headers });
                 if (!reqRes.ok) throw new Error('Ошибка загрузки заявок');
                 const reqData = await reqRes.json();
-                setPurchaseRequests(reqData);
+                setPurchaseRequests(reqData.results);
 
                 // 3. Отчёты (например, за последние 7 дней)
                 const today = new Date();
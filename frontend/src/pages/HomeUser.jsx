@@ -32,7 +32,7 @@ function HomeUser() {
 
                 if (res.ok) {
                     const data = await res.json();
-                    setReviews(data);
+                    setReviews(data.results);
                 }
             } catch (err) {
                 console.error("Ошибка загрузки отзывов:", err);